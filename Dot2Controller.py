@@ -1,10 +1,20 @@
 import asyncio
+import contextlib
 import aiohttp
-import json
+import jsoncodec
 import hashlib
 from enum import IntEnum
-from typing import Optional, Dict, Any, Callable, List
+from typing import Optional, Dict, Any, Callable, List, Tuple
 import dataclasses
+import itertools
+import time
+from array import array
+from latency import tracer, PMP_TO_DOT2
+from listeners import ListenerSet
+from recorder import DOT2_FRAME
+
+MAX_SHARD_ITEMS = 200  # executors per playbacks request in sharded mode
+MAX_QUEUED = 256  # outgoing items per priority class before senders wait for the writer
 
 
 
@@ -14,11 +24,178 @@ class ExecutorType(IntEnum):
 
 
 
+# outgoing frames are written in this order, lowest first
+class SendPriority(IntEnum):
+    SESSION = 0  # login, session handshake and keep alive
+    BUTTON = 1  # button presses and other commands that must not be dropped
+    FADER = 2  # fader positions and relative changes; a newer position for an executor supersedes a queued one
+    POLL = 3  # playbacks requests; a queued request is superseded by the next one
+
+
+
 @dataclasses.dataclass
 class ExecutorGroup:
     start_index: int
     count: int
     executor_type: ExecutorType
+    poll_rate: Optional[float] = None  # playbacks refreshes per second in sharded mode, None for the controller's rate
+
+
+
+class ExecutorStateStore:
+    """
+    Executor positions and active flags in typed arrays indexed by executor id (executor number - 1).
+    """
+
+    def __init__(self):
+        self.positions = array('d')
+        self.active = array('b')
+        self.known = array('b')
+
+    def __ensure(self, size: int):
+        missing = size - len(self.positions)
+        if missing > 0:
+            self.positions.extend(array('d', bytes(8 * missing)))
+            self.active.extend(array('b', bytes(missing)))
+            self.known.extend(array('b', bytes(missing)))
+
+    # writes a frame's values and returns the ids whose state changed
+    def update(self, ids: List[int], positions: array, active: array) -> List[int]:
+        count = len(ids)
+        if not count:
+            return []
+        start, end = ids[0], ids[0] + count
+        if ids[-1] != end - 1 or ids != list(range(start, end)):
+            return self.__update_scattered(ids, positions, active)
+        self.__ensure(end)
+        old_positions = self.positions[start:end]
+        old_active = self.active[start:end]
+        old_known = self.known[start:end]
+        if old_positions == positions and old_active == active and 0 not in old_known:
+            return []
+        changed = [
+            ids[i] for i in range(count)
+            if old_positions[i] != positions[i] or old_active[i] != active[i] or not old_known[i]
+        ]
+        self.positions[start:end] = positions
+        self.active[start:end] = active
+        self.known[start:end] = array('b', b"\x01" * count)
+        return changed
+
+    def __update_scattered(self, ids, positions, active) -> List[int]:
+        self.__ensure(max(ids) + 1)
+        changed = []
+        for executor_id, position, is_active in zip(ids, positions, active):
+            if self.positions[executor_id] != position or self.active[executor_id] != is_active or not self.known[executor_id]:
+                self.positions[executor_id] = position
+                self.active[executor_id] = is_active
+                self.known[executor_id] = 1
+                changed.append(executor_id)
+        return changed
+
+    def get(self, executor_id: int, default=None) -> Optional[Dict[str, Any]]:
+        if executor_id not in self:
+            return default
+        return {"position": self.positions[executor_id], "is_active": bool(self.active[executor_id])}
+
+    def __getitem__(self, executor_id: int) -> Dict[str, Any]:
+        state = self.get(executor_id)
+        if state is None:
+            raise KeyError(executor_id)
+        return state
+
+    def __contains__(self, executor_id: int) -> bool:
+        return 0 <= executor_id < len(self.known) and self.known[executor_id] == 1
+
+    def __len__(self) -> int:
+        return self.known.count(1)
+
+    def ids(self) -> List[int]:
+        return [executor_id for executor_id, known in enumerate(self.known) if known]
+
+    def clear(self):
+        self.positions = array('d')
+        self.active = array('b')
+        self.known = array('b')
+
+
+
+@dataclasses.dataclass
+class PollStats:
+    polls: int = 0
+    unchanged_polls: int = 0
+    timeouts: int = 0
+    identical_frames: int = 0  # responses skipped without parsing because the raw frame repeated
+    parsed_frames: int = 0
+    parse_total: float = 0.0  # seconds spent decoding and applying parsed responses
+    interval: float = 0.0
+    poll_rate: float = 0.0    # smoothed responses per second
+    last_response: float = 0.0
+
+
+
+@dataclasses.dataclass
+class RttStats:
+    samples: int = 0
+    last: float = 0.0
+    min: float = 0.0
+    max: float = 0.0
+    smoothed: float = 0.0  # exponentially weighted mean, as TCP's SRTT
+    variation: float = 0.0  # exponentially weighted mean deviation, as TCP's RTTVAR
+
+    def add(self, rtt: float):
+        if not self.samples:
+            self.min = self.max = self.smoothed = rtt
+            self.variation = rtt / 2
+        else:
+            self.min = min(self.min, rtt)
+            self.max = max(self.max, rtt)
+            self.variation = 0.75 * self.variation + 0.25 * abs(self.smoothed - rtt)
+            self.smoothed = 0.875 * self.smoothed + 0.125 * rtt
+        self.last = rtt
+        self.samples += 1
+
+
+
+@dataclasses.dataclass
+class PageSwitchStats:
+    switches: int = 0
+    cached_switches: int = 0  # switches redrawn from the page cache before the console answered
+    last_visible: float = 0.0  # seconds from set_page until listeners had the page's state
+    last_confirmed: float = 0.0  # seconds from set_page until the console's first response for the page
+    visible_total: float = 0.0
+    confirmed_total: float = 0.0
+
+
+
+@dataclasses.dataclass
+class BatchStats:
+    batches: int = 0
+    commands: int = 0
+    frames: int = 0
+    last_size: int = 0
+    max_size: int = 0
+
+
+
+@dataclasses.dataclass
+class SendQueueStats:
+    depth: int = 0  # items waiting to be written
+    max_depth: int = 0
+    sent: int = 0  # items written
+    dropped: int = 0  # items superseded by a newer one before they were written
+    last_wait: float = 0.0  # seconds the last written item was queued
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    def add_wait(self, wait: float):
+        self.sent += 1
+        self.last_wait = wait
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def wait_mean(self) -> float:
+        return self.wait_total / self.sent if self.sent else 0.0
 
 
 
@@ -28,16 +205,54 @@ class Dot2Controller:
         self._password: Optional[str] = None
         self.tasks = []
         self.connected = False
-        self.fader_event_listeners: List[Callable] = []
-        self.button_event_listeners: List[Callable] = []
-        self.button_states = {}
-        self.fader_states = {}
+        self.fader_event_listeners = ListenerSet("fader")
+        self.button_event_listeners = ListenerSet("button")
+        self.connection_listeners: List[Callable] = []
+        self.page_index = 0
+        self.page_states: Dict[int, Tuple[ExecutorStateStore, ExecutorStateStore]] = {}
+        self.fader_states, self.button_states = self.__page_stores(0)
+        self.page_stats = PageSwitchStats()
+        self.__page_switch_started = 0.0
         self.executor_config = {}
         self.client_session: Optional[aiohttp.ClientSession] = None
         self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
         self.session_id: Optional[str] = None
         self.keep_alive_interval = 15  # seconds
         self.timeout_seconds = 1  # 1 seconds timeout
+        self.retain_state_on_disconnect = False  # keep fader_states/button_states so a reconnect only reports changes
+        self.poll_rate = 30  # target playbacks refreshes per second
+        self.poll_max_interval = 0.5  # seconds, back-off ceiling when nothing changes
+        self.poll_backoff = 1.5  # interval multiplier per unchanged response
+        self.poll_timeout = 0.25  # minimum seconds to wait for a playbacks response before it counts as missed
+        self.max_missed_replies = 3  # consecutive missed playbacks responses before the link is declared dead
+        self.poll_stats = PollStats()
+        self.rtt_stats = RttStats()
+        self.__poll_sent_at = 0.0
+        self.__poll_requested_at = 0.0  # monotonic() when the last playbacks request was written
+        self.__missed_replies = 0
+        self.max_command_length = 250  # characters per joined command line
+        self.command_separator = " ; "
+        self.batch_stats = BatchStats()
+        self.__batch_depth = 0
+        self.__batched_commands: List[Tuple[str, SendPriority, Any, int]] = []
+        self.max_queued = MAX_QUEUED  # outgoing items per priority class
+        self.send_stats: Dict[SendPriority, SendQueueStats] = {priority: SendQueueStats() for priority in SendPriority}
+        # per class: key -> (frame or command, monotonic() when queued, executor number to trace)
+        self.__send_queues: List[Dict[Any, Tuple[str, float, int]]] = [{} for _ in SendPriority]
+        self.__send_sequence = itertools.count()  # keys of items nothing supersedes
+        self.__send_ready = asyncio.Event()
+        self.__send_space = asyncio.Event()
+        self.__poll_written = asyncio.Event()
+        self.__playbacks_request: Optional[str] = None
+        self.__last_playbacks_frame: Optional[str] = None
+        self.frame_time = 0.0  # perf_counter() arrival time of the message being handled, 0 when not tracing or between messages
+        self.recorder = None  # a recorder.Recorder that incoming frames are written to
+        self.snapshot = None  # a snapshot.SnapshotWriter the executor state is published to for other processes
+        self.frames_in = 0  # websocket text frames received
+        self.frames_out = 0  # websocket text frames sent
+        self.__playbacks_received = asyncio.Event()
+        self.__poll_wakeup = asyncio.Event()
+        self.__login_done = asyncio.Event()  # set on a login response or when the connection closes
 
    # raises OSError
     async def connect(self, address: str, password: str) -> bool:
@@ -46,6 +261,7 @@ class Dot2Controller:
         try:
             await self.__connect()
         except OSError as e:
+            await self.disconnect()
             raise OSError(f"Could not connect to dot2 on '{address}' ") from None
         
         
@@ -55,19 +271,28 @@ class Dot2Controller:
         if self.client_session and not self.client_session.closed:
             await self.client_session.close()
         self.client_session = aiohttp.ClientSession()
+        self.__login_done.clear()
         self.ws = await self.client_session.ws_connect(f"ws://{self.address}/?ma=1")
+        self.tasks.append(asyncio.create_task(self.__task_wrapper(self.__write_frames)))
         self.tasks.append(asyncio.create_task(self.__task_wrapper(self.__process_messages)))
         
         await self.__wait_for_connection()
+        self.poll_stats = PollStats(interval=1 / self.target_poll_rate())
+        self.rtt_stats = RttStats()
+        self.__missed_replies = 0
+        self.__playbacks_received.set()
+        self.__poll_wakeup.set()
         self.tasks.append(asyncio.create_task(self.__task_wrapper(self.__keep_alive)))
+        self.tasks.append(asyncio.create_task(self.__task_wrapper(self.__poll_playbacks)))
         
 
     async def __wait_for_connection(self) -> None:
-        for _ in range(self.timeout_seconds * 10): 
-            if self.connected:
-                return
-            await asyncio.sleep(0.1)
-        raise TimeoutError("Connection timeout")
+        try:
+            await asyncio.wait_for(self.__login_done.wait(), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Connection timeout") from None
+        if not self.connected:
+            raise ConnectionRefusedError("Login failed")
 
 
     async def __login(self):
@@ -83,31 +308,47 @@ class Dot2Controller:
 
 
     async def disconnect(self):
+        current_task = asyncio.current_task()
         for task in self.tasks:
-            if task: task.cancel()
+            if task and task is not current_task: task.cancel()
+        self.tasks.clear()
           
         
         if self.ws and not self.ws.closed:
             if self.session_id:
-                await self.__send({"requestType": "close", "session": self.session_id})
+                await self.__send_raw(jsoncodec.dumps({"requestType": "close", "session": self.session_id}))
             await self.ws.close()
         
         if self.client_session and not self.client_session.closed:
             await self.client_session.close()
 
-        self.connected = False
+        self.__set_connected(False)
+        self.__login_done.set()
         self.session_id = None
+        self.__playbacks_request = None
+        self.__last_playbacks_frame = None
         self.client_session = None
         self.ws = None
-        self.button_states.clear()
-        self.fader_states.clear()
+        self.__clear_send_queues()
+        if not self.retain_state_on_disconnect:
+            self.page_states.clear()
+            self.fader_states, self.button_states = self.__page_stores(self.page_index)
+            self.__publish()
         
     def is_connected(self) -> bool:
         return self.connected
 
+    def __set_connected(self, connected: bool):
+        if self.connected == connected:
+            return
+        self.connected = connected
+        self.__publish()
+        for listener in self.connection_listeners:
+            listener(connected)
+
     async def __task_wrapper(self, callable: Callable):
         try:
-            while True:
+            while self.ws is not None:
                 await callable()
         except asyncio.CancelledError:
             pass
@@ -117,9 +358,9 @@ class Dot2Controller:
         await asyncio.sleep(self.keep_alive_interval)
         if self.connected and self.ws and not self.ws.closed:
             try:
-                await self.__send({"session": self.session_id})
+                await self.__queue(SendPriority.SESSION, jsoncodec.dumps({"session": self.session_id}), "keep alive")
             except Exception as e:
-                self.connected = False
+                self.__set_connected(False)
                 raise e
         
 
@@ -134,85 +375,261 @@ class Dot2Controller:
 
             if message.type != aiohttp.WSMsgType.TEXT:
                 continue
-            
-            data = json.loads(message.data)
-
-            if data.get("responseType") == "login":
-                if data.get("result"):
-                    self.connected = True
-                    await self.__request_playbacks()
-                else:
-                    break
-                    
-            if data.get("responseType") == "playbacks":
-                await self.__process_playback(data)
-                await self.__request_playbacks()
-
-            if data.get("session"):
-                self.session_id = data.get("session")
-            
-            if data.get("forceLogin"):
-                await self.__login()
-
-            
-            if data.get("status") and data.get("appType"):
-                await self.__send({"session": 0})
+            self.frames_in += 1
+            if self.recorder is not None:
+                self.recorder.record(DOT2_FRAME, message.data.encode())
+            if not await self.feed_message(message.data):
+                break
 
         await self.disconnect()
 
+    # handles one text frame as if the console had sent it; False when the session must end. Used to replay recordings
+    async def feed_message(self, frame: str) -> bool:
+        started = time.perf_counter()
+
+        if frame == self.__last_playbacks_frame:
+            self.poll_stats.identical_frames += 1
+            self.__schedule_poll(False)
+            return True
+
+        data = jsoncodec.loads(frame)
+
+        if data.get("responseType") == "login":
+            if data.get("result"):
+                self.__set_connected(True)
+                self.__login_done.set()
+            else:
+                return False
+
+        if data.get("responseType") == "playbacks":
+            if data.get("iPage", self.page_index + 1) != self.page_index + 1:
+                self.__schedule_poll(False)  # answer to a request for the previous page
+                return True
+            if self.__page_switch_started:
+                self.__confirm_page_switch()
+            if tracer.enabled:
+                self.frame_time = started
+            changed = await self.__process_playback(data)
+            self.frame_time = 0.0  # listeners called later, e.g. for a cached page, are not answering a frame
+            self.poll_stats.parsed_frames += 1
+            self.poll_stats.parse_total += time.perf_counter() - started
+            self.__last_playbacks_frame = frame
+            if changed:
+                self.__publish()
+            self.__schedule_poll(changed)
+
+        if data.get("session") and data.get("session") != self.session_id:
+            self.session_id = data.get("session")
+            self.__playbacks_request = None
+
+        if self.ws is None:
+            return True  # replayed frame, nothing to answer
+
+        if data.get("forceLogin"):
+            await self.__login()
+
+        if data.get("status") and data.get("appType"):
+            await self.__send({"session": 0})
+        return True
+
+
+    def __schedule_poll(self, changed: bool):
+        stats = self.poll_stats
+        now = time.monotonic()
+        if self.__poll_sent_at:
+            self.rtt_stats.add(now - self.__poll_sent_at)
+            self.__poll_sent_at = 0.0
+        self.__missed_replies = 0
+        if stats.last_response:
+            rate = 1 / max(now - stats.last_response, 1e-6)
+            stats.poll_rate = rate if not stats.poll_rate else stats.poll_rate * 0.9 + rate * 0.1
+        stats.last_response = now
+        stats.polls += 1
+        if changed:
+            stats.interval = 1 / self.target_poll_rate()
+        else:
+            stats.unchanged_polls += 1
+            stats.interval = min(stats.interval * self.poll_backoff, self.poll_max_interval)
+        self.__playbacks_received.set()
+
+
+    # the rate this session polls at
+    def target_poll_rate(self) -> float:
+        return self.poll_rate
+
+
+    def __wake_poller(self):
+        self.poll_stats.interval = 1 / self.target_poll_rate()
+        self.__poll_wakeup.set()
+
+
+    # the playbacks round trip doubles as the heartbeat
+    async def __poll_playbacks(self):
+        try:
+            await asyncio.wait_for(self.__playbacks_received.wait(), self.__reply_timeout())
+        except asyncio.TimeoutError:
+            self.poll_stats.timeouts += 1
+            self.__missed_replies += 1
+            if self.__missed_replies >= self.max_missed_replies:
+                await self.disconnect()
+                return
+            self.__poll_wakeup.set()  # re-request without waiting out the poll interval
+        self.__playbacks_received.clear()
+        delay = self.poll_stats.interval - (time.monotonic() - self.__poll_requested_at)  # the round trip is part of the interval
+        if delay > 0:
+            try:
+                await asyncio.wait_for(self.__poll_wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        self.__poll_wakeup.clear()
+        try:
+            await self.__request_playbacks()
+            self.__poll_requested_at = time.monotonic()
+        except Exception as e:
+            self.__set_connected(False)
+            raise e
+
 
-    async def __process_playback(self, data):
+    def __reply_timeout(self) -> float:
+        rtt = self.rtt_stats
+        if not rtt.samples:
+            return max(self.poll_timeout, self.timeout_seconds)
+        return max(self.poll_timeout, rtt.smoothed + 4 * rtt.variation)
+
+
+    async def __process_playback(self, data) -> bool:
         if "itemGroups" not in data:
-            return
+            return False
 
-        def extract_executors(item_groups):
-            for group in item_groups:
-                executor_type = group.get("itemsType")
-                if executor_type not in (ExecutorType.BUTTON, ExecutorType.FADER):
-                    continue
-                for item in (item for item_list in group.get("items", []) for item in item_list):
-                    executor = {
-                        "id": item.get("iExec"),
-                        "is_active": (item.get("isRun", 0) == 1),
-                        "position": 0
-                    }
-                    if executor_type == ExecutorType.FADER:
-                        executor["position"] = get_fader_position(item)
-                    yield executor_type, executor 
-
-        def state_changed(state_dict, executor, keys):
-            old_state = state_dict.get(executor["id"], {})
-            new_state = {"position": executor["position"], "is_active": executor["is_active"]}
-            changed = old_state != new_state
-            if changed:
-                state_dict[executor["id"]] = new_state
-            return changed
-        
         def get_fader_position(item):
             for block in item.get("executorBlocks", []):
                 if "fader" in block:
                     return block["fader"].get("v", 0)
             return 0
+        changed = False
         try:
-            for executor_type, executor in extract_executors(data["itemGroups"]):
-                if executor_type == ExecutorType.FADER: 
-                    if state_changed(self.fader_states, executor, ["position", "is_active"]):
-                        for listener in self.fader_event_listeners:
-                            listener(executor["id"] + 1, executor["is_active"], executor["position"])
-                        
-                else:  
-                    if state_changed(self.button_states, executor, ["is_active"]):
-                        for listener in self.button_event_listeners:
-                            listener(executor["id"] + 1, executor["is_active"])
+            for group in data["itemGroups"]:
+                executor_type = group.get("itemsType")
+                if executor_type not in (ExecutorType.BUTTON, ExecutorType.FADER):
+                    continue
+                items = [item for item_list in group.get("items", []) for item in item_list]
+                ids = [item.get("iExec") for item in items]
+                active = array('b', [item.get("isRun", 0) == 1 for item in items])
+                if executor_type == ExecutorType.FADER:
+                    store = self.fader_states
+                    positions = array('d', [get_fader_position(item) for item in items])
+                else:
+                    store = self.button_states
+                    positions = array('d', bytes(8 * len(items)))
+                changed_ids = store.update(ids, positions, active)
+                if not changed_ids:
+                    continue
+                changed = True
+                if executor_type == ExecutorType.FADER:
+                    for executor_id in changed_ids:
+                        is_active, position = store.active[executor_id] == 1, store.positions[executor_id]
+                        self.fader_event_listeners.dispatch(executor_id + 1, is_active, position)
+                else:
+                    for executor_id in changed_ids:
+                        is_active = store.active[executor_id] == 1
+                        self.button_event_listeners.dispatch(executor_id + 1, is_active)
         except Exception as e:
             await self.disconnect()
             raise e
+        return changed
 
     async def __send(self, payload: Dict[str, Any]):
+        await self.__queue(SendPriority.SESSION, jsoncodec.dumps(payload))
+
+    # queues a frame, or a command of the BUTTON and FADER classes, for the writer; an item with the key of a
+    # queued one supersedes it, otherwise the sender waits while its class holds max_queued items
+    # raises ConnectionAbortedError
+    async def __queue(self, priority: SendPriority, data: str, key: Any = None, executor_number: int = 0):
+        queue = self.__send_queues[priority]
+        stats = self.send_stats[priority]
+        if key is None:
+            key = next(self.__send_sequence)
+        while key not in queue and len(queue) >= self.max_queued and self.ws is not None:
+            self.__send_space.clear()
+            await self.__send_space.wait()
+        if self.ws is None:
+            raise ConnectionAbortedError("Not Connected!")
+        enqueued_at = time.monotonic()
+        if key in queue:
+            enqueued_at = queue.pop(key)[1]  # moved behind relative changes queued since, keeping its wait
+            stats.dropped += 1
+        queue[key] = (data, enqueued_at, executor_number)
+        stats.depth = len(queue)
+        stats.max_depth = max(stats.max_depth, stats.depth)
+        self.__send_ready.set()
+
+    # the only task writing to the socket, so one frame is in flight and queued items can still be reordered or superseded
+    async def __write_frames(self):
+        await self.__send_ready.wait()
+        self.__send_ready.clear()
+        while self.ws is not None:
+            traced: List[int] = []
+            next_frame = self.__next_frame(traced)
+            if next_frame is None:
+                return
+            priority, frame = next_frame
+            try:
+                await self.__send_raw(frame)
+            except ConnectionAbortedError:
+                await self.disconnect()
+                return
+            # after the write, so time spent in a backed-up socket counts
+            if priority == SendPriority.POLL:
+                self.__poll_sent_at = time.monotonic()
+                self.__poll_written.set()
+            for executor_number in traced:
+                tracer.end(PMP_TO_DOT2, executor_number)
+
+    # adds the executors of traced commands in the frame to traced
+    def __next_frame(self, traced: List[int]) -> Optional[Tuple[SendPriority, str]]:
+        now = time.monotonic()
+        for priority in SendPriority:
+            queue = self.__send_queues[priority]
+            if not queue:
+                continue
+            stats = self.send_stats[priority]
+            if priority in (SendPriority.BUTTON, SendPriority.FADER):
+                line = ""
+                for key, (command, enqueued_at, executor_number) in list(queue.items()):
+                    if line and len(line) + len(self.command_separator) + len(command) > self.max_command_length:
+                        break
+                    line = f"{line}{self.command_separator}{command}" if line else command
+                    del queue[key]
+                    stats.add_wait(now - enqueued_at)
+                    if executor_number and tracer.enabled:
+                        traced.append(executor_number)
+                frame = jsoncodec.dumps({
+                    "requestType": "command",
+                    "command": line,
+                    "session": self.session_id
+                })
+                self.batch_stats.frames += 1
+            else:
+                frame, enqueued_at, _ = queue.pop(next(iter(queue)))
+                stats.add_wait(now - enqueued_at)
+            stats.depth = len(queue)
+            self.__send_space.set()
+            return priority, frame
+        return None
+
+    def __clear_send_queues(self):
+        for priority in SendPriority:
+            self.__send_queues[priority].clear()
+            self.send_stats[priority].depth = 0
+        self.__send_ready.clear()
+        self.__send_space.set()  # senders waiting for space see the connection is gone
+
+    async def __send_raw(self, frame: str):
         try:
             if not self.ws:
                 raise RuntimeError("WebSocket connection not established")
-            await self.ws.send_str(json.dumps(payload, separators=(',', ':')))
+            await self.ws.send_str(frame)
+            self.frames_out += 1
         except aiohttp.client_exceptions.ClientConnectionResetError:
             raise ConnectionAbortedError("Not Connected!")
 
@@ -220,47 +637,156 @@ class Dot2Controller:
     async def __request_playbacks(self):
         if not self.session_id:
             return
-        payload = {
+        if self.__playbacks_request is None:
+            self.__playbacks_request = self.__build_playbacks_request()
+        self.__poll_written.clear()
+        await self.__queue(SendPriority.POLL, self.__playbacks_request, "playbacks")
+        await self.__poll_written.wait()  # the response timeout runs from the write, not from queueing
+
+    def __build_playbacks_request(self) -> str:
+        return jsoncodec.dumps({
             "requestType": "playbacks",
             "startIndex": self.executor_config.get("startIndex", []),
             "itemsCount": self.executor_config.get("itemsCount", []),
-            "pageIndex": 0,     
+            "pageIndex": self.page_index,
             "itemsType": self.executor_config.get("itemsType", []),
             "view": 2,                  # fader view
             "execButtonViewMode": 1,    
             "buttonsViewMode": 0,
             "session": self.session_id,
             "maxRequests": 1
-        }
-        await self.__send(payload)
+        })
 
+    # commands are queued with BUTTON priority and joined into as few frames as fit max_command_length when written
     # raises ConnectionAbortedError
     async def send_command(self, command: str):
-        await self.__send({
-            "requestType": "command",
-            "command": command,
-            "session": self.session_id
-        })
+        await self.__send_command(command, SendPriority.BUTTON)
 
     # raises ConnectionAbortedError
-    async def set_fader(self, executor_number: int, normalized_position: float):
+    async def send_commands(self, commands: List[str]):
+        await self.__queue_commands([(command, SendPriority.BUTTON, None, 0) for command in commands])
+
+    async def __send_command(self, command: str, priority: SendPriority, key: Any = None, executor_number: int = 0):
+        if self.__batch_depth:
+            self.__batched_commands.append((command, priority, key, executor_number))
+            return
+        await self.__queue_commands([(command, priority, key, executor_number)])
+
+    async def __queue_commands(self, commands: List[Tuple[str, SendPriority, Any, int]]):
+        if not commands:
+            return
+        self.__wake_poller()
+        for command, priority, key, executor_number in commands:
+            await self.__queue(priority, command, key, executor_number)
+        stats = self.batch_stats
+        stats.batches += 1
+        stats.commands += len(commands)
+        stats.last_size = len(commands)
+        stats.max_size = max(stats.max_size, len(commands))
+
+    # collects send_command calls and queues them together on exit, so they share frames
+    # raises ConnectionAbortedError
+    @contextlib.asynccontextmanager
+    async def batch(self):
+        self.__batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            self.__batch_depth -= 1
+            if not self.__batch_depth:
+                self.__batched_commands.clear()
+            raise
+        self.__batch_depth -= 1
+        if not self.__batch_depth:
+            commands, self.__batched_commands = self.__batched_commands, []
+            await self.__queue_commands(commands)
+
+    def __page_stores(self, page_index: int) -> Tuple[ExecutorStateStore, ExecutorStateStore]:
+        stores = self.page_states.get(page_index)
+        if stores is None:
+            stores = self.page_states[page_index] = (ExecutorStateStore(), ExecutorStateStore())
+        return stores
+
+    # follows another executor page; listeners get the page's cached state at once and updates once the console answers
+    def set_page(self, page_index: int, dispatch_cached: bool = True):
+        if page_index < 0: raise ValueError("Page must not be negative")
+        if page_index == self.page_index:
+            return
+        started = time.perf_counter()
+        self.page_index = page_index
+        self.fader_states, self.button_states = self.__page_stores(page_index)
+        self.__playbacks_request = None
+        self.__last_playbacks_frame = None
+        self.__page_switch_started = started
+        self.page_stats.switches += 1
+        if dispatch_cached and (len(self.fader_states) or len(self.button_states)):
+            for executor_id in self.fader_states.ids():
+                is_active, position = self.fader_states.active[executor_id] == 1, self.fader_states.positions[executor_id]
+                self.fader_event_listeners.dispatch(executor_id + 1, is_active, position)
+            for executor_id in self.button_states.ids():
+                is_active = self.button_states.active[executor_id] == 1
+                self.button_event_listeners.dispatch(executor_id + 1, is_active)
+            self.page_stats.cached_switches += 1
+            self.page_stats.last_visible = time.perf_counter() - started
+            self.page_stats.visible_total += self.page_stats.last_visible
+        else:
+            self.page_stats.last_visible = 0.0
+        self.__publish()
+        self.__wake_poller()
+
+    def __publish(self):
+        if self.snapshot is not None:
+            self.snapshot.publish(self.fader_states, self.button_states, self.page_index, self.connected)
+
+    def __confirm_page_switch(self):
+        stats = self.page_stats
+        stats.last_confirmed = time.perf_counter() - self.__page_switch_started
+        stats.confirmed_total += stats.last_confirmed
+        if not stats.last_visible:
+            stats.last_visible = stats.last_confirmed
+            stats.visible_total += stats.last_visible
+        self.__page_switch_started = 0.0
+
+    def __executor_name(self, executor_number: int, page_index: Optional[int] = None) -> str:
+        if page_index is None:
+            page_index = self.page_index
+        if page_index:
+            return f"{page_index + 1}.{executor_number}"
+        return str(executor_number)
+
+    # page_index defaults to the followed page
+    # raises ConnectionAbortedError
+    async def set_fader(self, executor_number: int, normalized_position: float, page_index: Optional[int] = None):
         if executor_number < 1: raise ValueError("Executor must be positive")
-        command = f"Executor {executor_number} At {normalized_position * 100}"
-        await self.send_command(command)
+        executor_name = self.__executor_name(executor_number, page_index)
+        command = f"Executor {executor_name} At {normalized_position * 100}"
+        await self.__send_command(command, SendPriority.FADER, executor_name, executor_number)
         
     # raises ConnectionAbortedError
-    async def set_button(self, executor_number: int, is_active: bool):
+    async def change_fader(self, executor_number: int, normalized_change: float, page_index: Optional[int] = None):
         if executor_number < 1: raise ValueError("Executor must be positive")
-        command = f"{"On" if is_active else "Off"} Executor {executor_number}"
-        await self.send_command(command)
+        sign = "-" if normalized_change < 0 else "+"
+        command = f"Executor {self.__executor_name(executor_number, page_index)} At {sign} {abs(normalized_change) * 100}"
+        await self.__send_command(command, SendPriority.FADER, executor_number=executor_number)
+
+    # raises ConnectionAbortedError
+    async def set_button(self, executor_number: int, is_active: bool, page_index: Optional[int] = None):
+        if executor_number < 1: raise ValueError("Executor must be positive")
+        command = f"{"On" if is_active else "Off"} Executor {self.__executor_name(executor_number, page_index)}"
+        await self.__send_command(command, SendPriority.BUTTON, executor_number=executor_number)
+
 
+    # coroutine listeners run as tasks, run_in_executor listeners on a thread pool; plain functions inline
+    def add_fader_event_listener(self, callback: Callable, run_in_executor: bool = False):
+        self.fader_event_listeners.add(callback, run_in_executor)
 
-    def add_fader_event_listener(self, callback: Callable):
-        self.fader_event_listeners.append(callback)
 
+    def add_button_event_listener(self, callback: Callable, run_in_executor: bool = False):
+        self.button_event_listeners.add(callback, run_in_executor)
 
-    def add_button_event_listener(self, callback: Callable):
-        self.button_event_listeners.append(callback)
+
+    def add_connection_listener(self, callback: Callable):
+        self.connection_listeners.append(callback)
 
 
     def remove_fader_event_listener(self, callback: Callable):
@@ -271,6 +797,10 @@ class Dot2Controller:
         self.button_event_listeners.remove(callback)
 
 
+    def remove_connection_listener(self, callback: Callable):
+        self.connection_listeners.remove(callback)
+
+
     def set_executor_groups(self, configs: List[ExecutorGroup]):
         self.executor_config = {
             "startIndex": [],
@@ -281,4 +811,135 @@ class Dot2Controller:
             self.executor_config["startIndex"].append(config.start_index - 1)
             self.executor_config["itemsCount"].append(config.count)
             self.executor_config["itemsType"].append(config.executor_type)
+        self.__playbacks_request = None
+        self.__last_playbacks_frame = None
+
 
+
+@dataclasses.dataclass
+class ShardStats:
+    executors: int
+    target_rate: float  # requested playbacks refreshes per second
+    poll_rate: float  # smoothed responses per second
+    polls: int
+    timeouts: int
+    rtt: float  # smoothed round trip seconds
+    rtt_max: float
+    parse_mean: float  # seconds per parsed response
+
+    @classmethod
+    def of(cls, controller: Dot2Controller, groups: List[ExecutorGroup]) -> "ShardStats":
+        poll_stats = controller.poll_stats
+        return cls(
+            executors=sum(group.count for group in groups),
+            target_rate=controller.target_poll_rate(),
+            poll_rate=poll_stats.poll_rate,
+            polls=poll_stats.polls,
+            timeouts=poll_stats.timeouts,
+            rtt=controller.rtt_stats.smoothed,
+            rtt_max=controller.rtt_stats.max,
+            parse_mean=poll_stats.parse_total / poll_stats.parsed_frames if poll_stats.parsed_frames else 0.0
+        )
+
+
+
+class ShardedDot2Controller(Dot2Controller):
+    """
+    A Dot2Controller that polls its executor groups over several console sessions at once.
+
+    Groups are split by their `poll_rate` and into shards of at most `max_shard_items` executors.
+    The first shard is polled by this controller's own session, which also sends all commands;
+    every other shard gets its own session. All shards write to the same page states and listeners,
+    so `fader_states`, `button_states` and the event listeners behave as with a single session.
+    """
+
+    def __init__(self, max_shard_items: int = MAX_SHARD_ITEMS):
+        super().__init__()
+        self.max_shard_items = max_shard_items
+        self.shards: List[Dot2Controller] = []
+        self.__plan: List[List[ExecutorGroup]] = [[]]
+        self.__disconnecting = False
+
+    # raises OSError
+    async def connect(self, address: str, password: str) -> bool:
+        for shard in self.shards:
+            self.__share_state(shard)
+            self.__configure(shard)
+        try:
+            await asyncio.gather(*(shard.connect(address, password) for shard in self.shards))
+        except OSError:
+            await self.disconnect()
+            raise OSError(f"Could not connect to dot2 on '{address}' ") from None
+        await super().connect(address, password)
+
+    async def disconnect(self):
+        if self.__disconnecting:
+            return
+        self.__disconnecting = True
+        try:
+            await asyncio.gather(*(shard.disconnect() for shard in self.shards))
+            await super().disconnect()
+        finally:
+            self.__disconnecting = False
+
+    def is_connected(self) -> bool:
+        return self.connected and all(shard.connected for shard in self.shards)
+
+    def __shard_connection_changed(self, connected: bool):
+        if not connected and self.connected and not self.__disconnecting:
+            asyncio.get_running_loop().create_task(self.disconnect())
+
+    def set_page(self, page_index: int, dispatch_cached: bool = True):
+        super().set_page(page_index, dispatch_cached)
+        for shard in self.shards:
+            shard.set_page(page_index, dispatch_cached=False)
+
+    def set_executor_groups(self, configs: List[ExecutorGroup]):
+        if any(shard.ws is not None for shard in self.shards):
+            raise RuntimeError("Executor groups of a sharded controller can only change while disconnected")
+        self.__plan = self.__plan_shards(configs)
+        super().set_executor_groups(self.__plan[0])
+        self.shards = []
+        for groups in self.__plan[1:]:
+            shard = Dot2Controller()
+            shard.retain_state_on_disconnect = True  # the shared page states are cleared by this controller
+            shard.set_executor_groups(groups)
+            shard.add_connection_listener(self.__shard_connection_changed)
+            self.__share_state(shard)
+            self.shards.append(shard)
+
+    # the first shard's groups may have their own rate; poll_rate stays the default for groups without one
+    def target_poll_rate(self) -> float:
+        groups = self.__plan[0]
+        return groups[0].poll_rate if groups and groups[0].poll_rate else self.poll_rate
+
+    def shard_stats(self) -> List[ShardStats]:
+        return [ShardStats.of(controller, groups) for controller, groups in zip([self, *self.shards], self.__plan)]
+
+    def __plan_shards(self, configs: List[ExecutorGroup]) -> List[List[ExecutorGroup]]:
+        by_rate: Dict[Optional[float], List[List[ExecutorGroup]]] = {}
+        for config in configs:
+            shards = by_rate.setdefault(config.poll_rate, [])
+            if not shards or sum(group.count for group in shards[-1]) + config.count > self.max_shard_items:
+                shards.append([])
+            shards[-1].append(config)
+        return [groups for shards in by_rate.values() for groups in shards] or [[]]
+
+    def __share_state(self, shard: Dot2Controller):
+        shard.page_states = self.page_states
+        shard.page_index = self.page_index
+        shard.fader_states, shard.button_states = self.fader_states, self.button_states
+        shard.fader_event_listeners = self.fader_event_listeners
+        shard.button_event_listeners = self.button_event_listeners
+
+    def __configure(self, shard: Dot2Controller):
+        groups = self.__plan[self.shards.index(shard) + 1]
+        shard.poll_rate = groups[0].poll_rate or self.poll_rate
+        shard.keep_alive_interval = self.keep_alive_interval
+        shard.timeout_seconds = self.timeout_seconds
+        shard.poll_max_interval = self.poll_max_interval
+        shard.poll_backoff = self.poll_backoff
+        shard.poll_timeout = self.poll_timeout
+        shard.max_missed_replies = self.max_missed_replies
+        shard.recorder = self.recorder
+        shard.snapshot = self.snapshot
@@ -0,0 +1,138 @@
+import queue
+import sys
+import threading
+import time
+import types
+from typing import Callable, List, Optional
+
+class SystemError(Exception):
+    pass
+
+class FakeDevice:
+    """
+    A virtual MIDI device with one input and one output port.
+
+    Messages passed to `send` are delivered to the open input's callback on a separate thread,
+    the way rtmidi does. Messages written to the output port are kept in `received`.
+    Like WinMM, each port can only be opened by one `MidiIn` or `MidiOut` at a time.
+    """
+
+    def __init__(self, name: str = "Platform M+ V2.15"):
+        self.name = name
+        self.plugged_in = True
+        self.received: List[tuple] = []  # (perf_counter time, message)
+        self.on_message: Optional[Callable] = None
+        self.midi_in: Optional["MidiIn"] = None
+        self.midi_out: Optional["MidiOut"] = None
+        self.__queue = queue.SimpleQueue()
+        self.__last_send = time.perf_counter()
+        self.__thread = threading.Thread(target=self.__deliver, daemon=True)
+        self.__thread.start()
+
+    def send(self, message: List[int]):
+        """
+        Send a message from the device to the host.
+        """
+        self.__queue.put(list(message))
+
+    def wait_idle(self, timeout: float = 5):
+        deadline = time.monotonic() + timeout
+        while not self.__queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def __deliver(self):
+        while True:
+            message = self.__queue.get()
+            midi_in = self.midi_in
+            if midi_in is None or midi_in.callback is None:
+                continue
+            now = time.perf_counter()
+            delta, self.__last_send = now - self.__last_send, now
+            midi_in.callback((message, delta), midi_in.callback_data)
+
+class FakeBackend:
+    devices: List[FakeDevice] = []
+
+    # numbered the way WinMM does, so unplugging a device renumbers the ones after it
+    @classmethod
+    def ports(cls) -> List[str]:
+        plugged_in = [device for device in cls.devices if device.plugged_in]
+        return [f"{device.name} {index}" for index, device in enumerate(plugged_in)]
+
+    @classmethod
+    def device(cls, port: int) -> FakeDevice:
+        return [device for device in cls.devices if device.plugged_in][port]
+
+class _MidiBase:
+    device_attribute = ""  # the FakeDevice attribute holding the port that has the device open
+
+    def __init__(self, *args, **kwargs):
+        self.device: Optional[FakeDevice] = None
+
+    def get_ports(self) -> List[str]:
+        return FakeBackend.ports()
+
+    def get_port_count(self) -> int:
+        return len(FakeBackend.ports())
+
+    def is_port_open(self) -> bool:
+        return self.device is not None
+
+    def open_port(self, port: int = 0, name: Optional[str] = None):
+        try:
+            device = FakeBackend.device(port)
+        except IndexError:
+            raise SystemError(f"Invalid port number {port}") from None
+        if getattr(device, self.device_attribute) not in (None, self):
+            raise SystemError(f"Port {port} is already open")
+        self.close_port()
+        self.device = device
+        setattr(device, self.device_attribute, self)
+        return self
+
+    def close_port(self):
+        if self.device and getattr(self.device, self.device_attribute) is self:
+            setattr(self.device, self.device_attribute, None)
+        self.device = None
+
+class MidiIn(_MidiBase):
+    device_attribute = "midi_in"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.callback: Optional[Callable] = None
+        self.callback_data = None
+
+    def set_callback(self, callback: Callable, data=None):
+        self.callback = callback
+        self.callback_data = data
+
+    def cancel_callback(self):
+        self.callback = None
+
+class MidiOut(_MidiBase):
+    device_attribute = "midi_out"
+
+    def send_message(self, message: List[int]):
+        if self.device is None or not self.device.plugged_in:
+            raise SystemError("MidiOut: port is not open")
+        self.device.received.append((time.perf_counter(), tuple(message)))
+        if self.device.on_message:
+            self.device.on_message(message)
+
+def install(*devices: FakeDevice) -> types.ModuleType:
+    """
+    Register this module as `rtmidi` so `pmpcontroller` imports it. Must run before `pmpcontroller` is imported.
+
+    Args:
+        `*devices (FakeDevice)`: The devices to expose. Defaults to one Platform M+.
+
+    Returns:
+        `module (ModuleType)`: This module.
+    """
+    FakeBackend.devices = list(devices) or [FakeDevice()]
+    module = sys.modules[__name__]
+    sys.modules["rtmidi"] = module
+    return module
+
+__all__ = ['FakeDevice', 'FakeBackend', 'MidiIn', 'MidiOut', 'SystemError', 'install']
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import re
+import time
+from typing import Dict, List, Optional
+from aiohttp import web
+from Dot2Controller import ExecutorType
+
+COMMAND_PATTERN = re.compile(r"^(?:Executor (?:(\d+)\.)?(\d+) At (?:([+-]) )?([\d.]+)|(On|Off) Executor (?:(\d+)\.)?(\d+))$")
+
+class MockDot2Server:
+    """
+    A local stand-in for the dot2 web remote, speaking the subset of the protocol `Dot2Controller` uses:
+    the session handshake, login, `playbacks` requests and `command` requests.
+    """
+
+    def __init__(self, executor_count: int = 1000, latency: float = 0.0, password: str = "password"):
+        """
+        Args:
+            `executor_count (int, optional)`: The number of executors the console has. Defaults to 1000.
+            `latency (float, optional)`: Seconds to wait before answering each request. Defaults to 0.
+            `password (str, optional)`: The password logins are accepted with. Defaults to "password".
+        """
+        self.executor_count = executor_count
+        self.latency = latency
+        self.password = password
+        self.pages: Dict[int, tuple] = {}
+        self.positions, self.active = self.page(0)
+        self.frames_in = 0
+        self.frames_out = 0
+        self.polls = 0
+        self.commands = 0
+        self.command_log: List[tuple] = []  # (perf_counter time, executor number, value)
+        self.port: Optional[int] = None
+        self.__sessions = 0
+        self.__runner: Optional[web.AppRunner] = None
+        self.__sockets: List[web.WebSocketResponse] = []
+
+    @property
+    def address(self) -> str:
+        return f"127.0.0.1:{self.port}"
+
+    async def start(self, port: int = 0) -> str:
+        """
+        Start listening on localhost.
+
+        Returns:
+            `address (str)`: The host and port to pass to `Dot2Controller.connect`.
+        """
+        app = web.Application()
+        app.router.add_get("/", self.__handle)
+        self.__runner = web.AppRunner(app)
+        await self.__runner.setup()
+        site = web.TCPSite(self.__runner, "127.0.0.1", port)
+        await site.start()
+        self.port = self.__runner.addresses[0][1]
+        return self.address
+
+    async def stop(self):
+        for ws in list(self.__sockets):
+            await ws.close()
+        if self.__runner:
+            await self.__runner.cleanup()
+            self.__runner = None
+
+    async def drop_connections(self):
+        """
+        Close every open websocket, as a console reboot or network drop would.
+        """
+        for ws in list(self.__sockets):
+            await ws.close()
+
+    def page(self, page_index: int) -> tuple:
+        """
+        Returns:
+            `positions, active (tuple)`: The executor state lists of a page, by executor id.
+        """
+        if page_index not in self.pages:
+            self.pages[page_index] = ([0.0] * self.executor_count, [False] * self.executor_count)
+        return self.pages[page_index]
+
+    def set_fader(self, executor_number: int, normalized_position: float, page_index: int = 0):
+        positions, active = self.page(page_index)
+        positions[executor_number - 1] = normalized_position
+        active[executor_number - 1] = normalized_position > 0
+
+    def set_button(self, executor_number: int, is_active: bool, page_index: int = 0):
+        self.page(page_index)[1][executor_number - 1] = is_active
+
+    async def __handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.__sockets.append(ws)
+        try:
+            await self.__reply(ws, {"status": "server ready", "appType": "dot2"})
+            async for message in ws:
+                if message.type != web.WSMsgType.TEXT:
+                    continue
+                self.frames_in += 1
+                data = json.loads(message.data)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                await self.__dispatch(ws, data)
+        finally:
+            self.__sockets.remove(ws)
+        return ws
+
+    async def __reply(self, ws: web.WebSocketResponse, payload: Dict):
+        self.frames_out += 1
+        await ws.send_str(json.dumps(payload, separators=(",", ":")))
+
+    async def __dispatch(self, ws: web.WebSocketResponse, data: Dict):
+        request_type = data.get("requestType")
+        if request_type is None and data.get("session") == 0:
+            self.__sessions += 1
+            await self.__reply(ws, {"realtime": False, "session": self.__sessions, "forceLogin": True, "worldIndex": 0})
+        elif request_type is None:
+            await self.__reply(ws, {"session": data.get("session")})
+        elif request_type == "login":
+            await self.__reply(ws, {"responseType": "login", "result": data.get("password") is not None, "worldIndex": 0})
+        elif request_type == "playbacks":
+            self.polls += 1
+            await self.__reply(ws, self.playbacks_frame(data))
+        elif request_type == "command":
+            self.__run_command(data.get("command", ""))
+        elif request_type == "close":
+            await ws.close()
+
+    def __run_command(self, line: str):
+        now = time.perf_counter()
+        for command in line.split(";"):
+            match = COMMAND_PATTERN.match(command.strip())
+            if not match:
+                continue
+            self.commands += 1
+            if match.group(2):
+                page_index = int(match.group(1) or 1) - 1
+                executor_number, value = int(match.group(2)), float(match.group(4)) / 100
+                if match.group(3):
+                    current = self.page(page_index)[0][executor_number - 1]
+                    value = min(max(current + (value if match.group(3) == "+" else -value), 0.0), 1.0)
+                self.set_fader(executor_number, value, page_index)
+            else:
+                page_index = int(match.group(6) or 1) - 1
+                executor_number, value = int(match.group(7)), match.group(5) == "On"
+                self.set_button(executor_number, value, page_index)
+            self.command_log.append((now, executor_number, value))
+
+    def playbacks_frame(self, request: Dict) -> Dict:
+        """
+        Build the `playbacks` response for a request, in the layout the console uses.
+        """
+        positions, active = self.page(request.get("pageIndex", 0))
+        item_groups = []
+        for start, count, items_type in zip(request.get("startIndex", []), request.get("itemsCount", []), request.get("itemsType", [])):
+            items = []
+            for index in range(start, min(start + count, self.executor_count)):
+                item = {
+                    "i": {"t": f"Exec {index + 1}", "c": "#FFFFFF"},
+                    "iExec": index,
+                    "isRun": 1 if active[index] else 0,
+                    "executorBlocks": [{"button1": {"id": 0, "t": "Go"}}]
+                }
+                if items_type == ExecutorType.FADER:
+                    item["executorBlocks"].append({"fader": {"v": positions[index], "min": 0, "max": 1}})
+                items.append(item)
+            rows = [items[i:i + 5] for i in range(0, len(items), 5)]
+            item_groups.append({"itemsType": items_type, "cntPages": 1, "items": rows})
+        return {"responseType": "playbacks", "responseSubType": 2, "iPage": request.get("pageIndex", 0) + 1, "itemGroups": item_groups}
+
+__all__ = ['MockDot2Server']
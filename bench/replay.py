@@ -0,0 +1,53 @@
+"""
+Replay a recording made with main.RECORD_FILE into a Dot2PMPSync, without a console or a
+Platform M+, and report parsing and dispatch throughput.
+
+The bridge's console listeners redraw a fake Platform M+, and its surface handlers are attached
+to the MIDI events, so the listener timings cover the work a live bridge does per event.
+
+Usage:
+    python -m bench.replay recording.bin [--speed S] [--mapping mapping.json]
+"""
+import argparse
+import asyncio
+import functools
+
+from bench import fake_rtmidi
+fake_rtmidi.install()
+
+from pmpcontroller import PMPEvent
+from recorder import replay
+import main
+
+async def replay_recording(path: str, speed: float, mapping_file: str):
+    sync = main.Dot2PMPSync(surfaces=[(mapping_file, 0)])
+    sync.loop = asyncio.get_running_loop()
+    surface = sync.surfaces[0]
+    dot2, platform_m = sync.dot2, surface.platform_m
+    platform_m.add_event_listener(PMPEvent.FADER, functools.partial(sync.pmp_fader_changed, surface))
+    platform_m.add_event_listener(PMPEvent.BUTTON, functools.partial(sync.pmp_button_changed, surface))
+    platform_m.add_event_listener(PMPEvent.ENCODER, functools.partial(sync.pmp_encoder_changed, surface))
+    platform_m.connect()
+    try:
+        stats = await replay(path, dot2, platform_m, speed)
+    finally:
+        platform_m.disconnect()
+    print(f"{stats.frames} frames and {stats.midi_messages} MIDI messages "
+          f"({stats.recorded_duration:.2f}s recorded) replayed in {stats.duration:.3f}s, {stats.rate():.0f} per second")
+    print(f"{len(dot2.fader_states)} faders and {len(dot2.button_states)} buttons known, "
+          f"{dot2.poll_stats.identical_frames} identical frames skipped")
+    for listeners in (dot2.fader_event_listeners, dot2.button_event_listeners, *platform_m.event_callbacks.values()):
+        for timing in listeners.timings.values():
+            print(f"{listeners.name} listener {timing.name}: {timing.calls} calls, "
+                  f"mean {timing.mean() * 1e6:.1f} us, max {timing.max * 1e6:.1f} us")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=0, help="playback speed, 1 for real time; 0 (default) replays as fast as possible")
+    parser.add_argument("--mapping", default=main.MAPPING_FILE, help="mapping file the executor groups are taken from")
+    args = parser.parse_args()
+    asyncio.run(replay_recording(args.recording, args.speed, args.mapping))
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,249 @@
+"""
+Benchmarks for Dot2Controller and Dot2PMPSync against a local mock console and a fake MIDI backend.
+
+Usage:
+    python -m bench.run_bench [--repeat N] [--json results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import threading
+import time
+from typing import Callable, Dict, List
+
+from bench import fake_rtmidi
+fake_rtmidi.install()
+
+from bench.mock_dot2 import MockDot2Server
+from Dot2Controller import Dot2Controller, ExecutorGroup, ExecutorType, SendPriority, ShardedDot2Controller
+from latency import tracer, PMP_TO_DOT2
+import jsoncodec
+from pmpcontroller import MAX_DEVICE_VALUE, PITCH_BEND
+import main
+
+SEED = 2
+REGRESSION_THRESHOLD = 0.15  # relative change flagged by --compare
+
+async def wait_until(condition: Callable[[], bool], timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("Benchmark condition not reached")
+        await asyncio.sleep(0.001)
+
+async def connected_controller(server: MockDot2Server, executor_groups: List[ExecutorGroup]) -> Dot2Controller:
+    dot2 = Dot2Controller()
+    dot2.set_executor_groups(executor_groups)
+    await dot2.connect(server.address, server.password)
+    return dot2
+
+async def bench_commands(count: int = 2000) -> Dict[str, float]:
+    server = MockDot2Server()
+    await server.start()
+    dot2 = await connected_controller(server, [ExecutorGroup(1, 8, ExecutorType.FADER)])
+    rng = random.Random(SEED)
+    values = [rng.random() for _ in range(count)]
+    fader_stats = dot2.send_stats[SendPriority.FADER]
+    try:
+        # positions superseded in the send queue count as handled
+        start = time.perf_counter()
+        for index, value in enumerate(values):
+            await dot2.set_fader(index % 100 + 1, value)
+        await wait_until(lambda: server.commands + fader_stats.dropped >= count)
+        single = count / (time.perf_counter() - start)
+
+        server.commands = 0
+        fader_stats.dropped = 0
+        start = time.perf_counter()
+        for offset in range(0, count, 100):
+            async with dot2.batch():
+                for index, value in enumerate(values[offset:offset + 100]):
+                    await dot2.set_fader(index + 1, value)
+        await wait_until(lambda: server.commands + fader_stats.dropped >= count)
+        batched = count / (time.perf_counter() - start)
+    finally:
+        await dot2.disconnect()
+        await server.stop()
+    return {"commands_per_s": single, "batched_commands_per_s": batched}
+
+async def bench_polls(duration: float = 2, latency: float = 0.0) -> Dict[str, float]:
+    server = MockDot2Server(latency=latency)
+    await server.start()
+    dot2 = Dot2Controller()
+    dot2.poll_rate = 10000
+    dot2.poll_backoff = 1
+    dot2.set_executor_groups([
+        ExecutorGroup(1, 8, ExecutorType.FADER),
+        ExecutorGroup(101, 8, ExecutorType.BUTTON),
+        ExecutorGroup(201, 8, ExecutorType.BUTTON)
+    ])
+    try:
+        await dot2.connect(server.address, server.password)
+        start_polls = server.polls
+        await asyncio.sleep(duration)
+        polls = server.polls - start_polls
+    finally:
+        await dot2.disconnect()
+        await server.stop()
+    return {"polls_per_s": polls / duration}
+
+async def bench_parse(executor_count: int, frames: int = 300) -> Dict[str, float]:
+    server = MockDot2Server(executor_count=executor_count)
+    request = {"startIndex": [0], "itemsCount": [executor_count], "itemsType": [ExecutorType.FADER], "pageIndex": 0}
+    rng = random.Random(SEED)
+    changing = []
+    for _ in range(frames):
+        server.set_fader(rng.randrange(executor_count) + 1, rng.random())
+        changing.append(json.dumps(server.playbacks_frame(request)))
+    static = changing[-1]
+
+    dot2 = Dot2Controller()
+    process = dot2._Dot2Controller__process_playback
+    dot2.add_fader_event_listener(lambda executor_number, is_active, position: None)
+
+    start = time.perf_counter()
+    for raw in changing:
+        await process(jsoncodec.loads(raw))
+    changed = (time.perf_counter() - start) / frames
+    start = time.perf_counter()
+    for _ in range(frames):
+        await process(jsoncodec.loads(static))
+    unchanged = (time.perf_counter() - start) / frames
+    return {f"parse_us_{executor_count}_changed": changed * 1e6, f"parse_us_{executor_count}_unchanged": unchanged * 1e6}
+
+async def bench_page_switch(switches: int = 10, latency: float = 0.005) -> Dict[str, float]:
+    server = MockDot2Server(latency=latency)
+    await server.start()
+    dot2 = await connected_controller(server, [
+        ExecutorGroup(1, 8, ExecutorType.FADER),
+        ExecutorGroup(101, 8, ExecutorType.BUTTON),
+        ExecutorGroup(201, 8, ExecutorType.BUTTON)
+    ])
+    cold, cached = [], []
+    try:
+        await wait_until(lambda: len(dot2.fader_states) == 8)
+        for page_index in range(1, switches + 1):
+            for target, results in ((page_index, cold), (0, cached)):
+                dot2.page_stats.last_confirmed = 0.0
+                dot2.set_page(target)
+                await wait_until(lambda: dot2.page_stats.last_confirmed)
+                results.append(dot2.page_stats.last_visible)
+    finally:
+        await dot2.disconnect()
+        await server.stop()
+    return {"page_switch_cold_ms": statistics.median(cold) * 1000, "page_switch_cached_ms": statistics.median(cached) * 1000}
+
+async def bench_sharding(updates: int = 20, latency: float = 0.002) -> Dict[str, float]:
+    results = {}
+    groups = [ExecutorGroup(1, 8, ExecutorType.FADER, 60)]
+    groups += [ExecutorGroup(101 + index * 200, 200, ExecutorType.BUTTON, 5) for index in range(5)]
+    for name, dot2 in (("single", Dot2Controller()), ("sharded", ShardedDot2Controller())):
+        server = MockDot2Server(executor_count=1200, latency=latency)
+        await server.start()
+        seen = {}
+        dot2.set_executor_groups(groups)
+        dot2.add_fader_event_listener(lambda executor_number, is_active, position: seen.__setitem__(executor_number, position))
+        delays = []
+        try:
+            await dot2.connect(server.address, server.password)
+            await wait_until(lambda: len(dot2.button_states) == 1000)
+            for update in range(updates):
+                position = (update + 1) / (updates + 1)
+                server.set_fader(1, position)
+                start = time.perf_counter()
+                await wait_until(lambda: seen.get(1) == position)
+                delays.append(time.perf_counter() - start)
+        finally:
+            await dot2.disconnect()
+            await server.stop()
+        results[f"fader_update_ms_{name}"] = statistics.median(delays) * 1000
+    return results
+
+def sweep(device: fake_rtmidi.FakeDevice, fader_number: int, steps: int, interval: float):
+    for step in range(steps + 1):
+        value = MAX_DEVICE_VALUE * step // steps
+        device.send([PITCH_BEND + fader_number, value & 0x7F, value >> 7])
+        time.sleep(interval)
+
+async def bench_bridge(sweeps: int = 4, steps: int = 200, interval: float = 0.001) -> Dict[str, float]:
+    server = MockDot2Server()
+    await server.start()
+    device = fake_rtmidi.FakeBackend.devices[0]
+    sync = main.Dot2PMPSync(server.address, server.password)
+    tracer.reset()
+    main.TRACE_LATENCY = True
+    task = asyncio.create_task(sync.run())
+    settle = []
+    try:
+        await wait_until(lambda: sync.dot2.is_connected() and sync.platform_m.is_connected())
+        for index in range(sweeps):
+            fader_number = 7 - index % 4
+            executor_number = 8 - fader_number
+            server.command_log.clear()
+            thread = threading.Thread(target=sweep, args=(device, fader_number, steps, interval))
+            thread.start()
+            await asyncio.to_thread(thread.join)
+            sent = time.perf_counter()
+            await wait_until(lambda: server.positions[executor_number - 1] >= 0.999)
+            settle.append(server.command_log[-1][0] - sent)
+        histogram = tracer.directions[PMP_TO_DOT2].summary()
+        messages = sweeps * (steps + 1)
+    finally:
+        main.TRACE_LATENCY = tracer.enabled = False
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, SystemExit):
+            pass
+        await server.stop()
+    return {
+        "bridge_p50_ms": histogram["p50"] * 1000,
+        "bridge_p99_ms": histogram["p99"] * 1000,
+        "bridge_settle_ms": max(statistics.median(settle), 0) * 1000,
+        "bridge_commands_per_midi_message": sync.dot2_fader_queue.flushed / messages
+    }
+
+async def run_once() -> Dict[str, float]:
+    results = {}
+    results.update(await bench_commands())
+    results.update(await bench_polls())
+    for executor_count in (8, 100, 500):
+        results.update(await bench_parse(executor_count))
+    results.update(await bench_page_switch())
+    results.update(await bench_sharding())
+    results.update(await bench_bridge())
+    return results
+
+def lower_is_better(name: str) -> bool:
+    return not name.endswith("_per_s")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark; the median is reported")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="flag regressions against results written by --json")
+    args = parser.parse_args()
+
+    runs = [asyncio.run(run_once()) for _ in range(args.repeat)]
+    results = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    for name, value in results.items():
+        line = f"{name:<36} {value:14.3f}"
+        if name in baseline and baseline[name]:
+            change = (value - baseline[name]) / baseline[name]
+            worse = change > REGRESSION_THRESHOLD if lower_is_better(name) else change < -REGRESSION_THRESHOLD
+            line += f"  {change:+8.1%}{'  REGRESSION' if worse else ''}"
+        print(line)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+if __name__ == "__main__":
+    main_cli()
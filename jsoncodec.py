@@ -0,0 +1,23 @@
+import json
+from typing import Any, Union
+
+# orjson is optional; the stdlib json module is used when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+
+    def loads(data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+else:
+    BACKEND = "json"
+    loads = json.loads
+    dumps = json.JSONEncoder(separators=(',', ':')).encode
+
+__all__ = ['BACKEND', 'loads', 'dumps']
@@ -0,0 +1,168 @@
+import math
+import sys
+import time
+from typing import Dict, Optional, TextIO, Tuple
+
+PMP_TO_DOT2 = "pmp_to_dot2"
+DOT2_TO_PMP = "dot2_to_pmp"
+MIN_LATENCY = 1e-6  # seconds, lower edge of the first bucket
+BUCKETS_PER_DECADE = 20
+DECADES = 7  # 1 us to 10 s
+BUCKET_COUNT = BUCKETS_PER_DECADE * DECADES + 1
+
+class LatencyHistogram:
+    """
+    A fixed-size histogram of latencies with logarithmic buckets.
+    """
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        """
+        Record one latency sample.
+
+        Args:
+            `seconds (float)`: The measured latency in seconds.
+        """
+        if seconds <= MIN_LATENCY:
+            index = 0
+        else:
+            index = min(int(math.log10(seconds / MIN_LATENCY) * BUCKETS_PER_DECADE) + 1, BUCKET_COUNT - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> float:
+        """
+        Get the upper bound of the bucket holding a percentile.
+
+        Args:
+            `percent (float)`: The percentile, between 0 and 100.
+
+        Returns:
+            `latency (float)`: The latency in seconds, capped at the largest recorded sample.
+        """
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(MIN_LATENCY * 10 ** (index / BUCKETS_PER_DECADE), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Returns:
+            `summary (Dict[str, float])`: The sample count, mean, p50, p95, p99 and max, in seconds.
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max
+        }
+
+class LatencyTracer:
+    """
+    Collects sync latencies per direction and per executor.
+
+    Call sites check `enabled` before tracing, so a disabled tracer costs one attribute lookup.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.directions: Dict[str, LatencyHistogram] = {}
+        self.executors: Dict[Tuple[str, int], LatencyHistogram] = {}
+        self.__pending: Dict[Tuple[str, int], float] = {}
+
+    def begin(self, direction: str, executor_number: int, start: Optional[float] = None):
+        """
+        Start a span for an executor. If a span is already open, the earlier start is kept.
+
+        Args:
+            `direction (str)`: `PMP_TO_DOT2` or `DOT2_TO_PMP`.
+            `executor_number (int)`: The executor the span belongs to.
+            `start (float, optional)`: The `time.perf_counter()` timestamp the span started at. Defaults to now.
+        """
+        self.__pending.setdefault((direction, executor_number), start or time.perf_counter())
+
+    def end(self, direction: str, executor_number: int):
+        """
+        Close the open span for an executor, if any, and record its latency.
+        """
+        start = self.__pending.pop((direction, executor_number), None)
+        if start is not None:
+            self.record(direction, executor_number, time.perf_counter() - start)
+
+    def discard(self, direction: str, executor_number: int):
+        """
+        Drop the open span for an executor, if any, without recording it. For input that never results in a command.
+        """
+        self.__pending.pop((direction, executor_number), None)
+
+    def record(self, direction: str, executor_number: int, seconds: float):
+        """
+        Record a latency measured by the caller.
+        """
+        histogram = self.directions.get(direction)
+        if histogram is None:
+            histogram = self.directions[direction] = LatencyHistogram()
+        histogram.add(seconds)
+        key = (direction, executor_number)
+        histogram = self.executors.get(key)
+        if histogram is None:
+            histogram = self.executors[key] = LatencyHistogram()
+        histogram.add(seconds)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Returns:
+            `snapshot (Dict[str, Dict])`: Per direction, the overall summary and the summary per executor.
+        """
+        snapshot = {}
+        for direction, histogram in self.directions.items():
+            snapshot[direction] = {
+                "all": histogram.summary(),
+                "executors": {
+                    executor_number: executor_histogram.summary()
+                    for (executor_direction, executor_number), executor_histogram in sorted(self.executors.items())
+                    if executor_direction == direction
+                }
+            }
+        return snapshot
+
+    def dump(self, file: TextIO = sys.stdout):
+        """
+        Print the latency summaries in milliseconds.
+        """
+        def line(name, summary):
+            return (f"{name:>12}  n={summary['count']:<7} p50={summary['p50'] * 1000:8.3f}  "
+                    f"p95={summary['p95'] * 1000:8.3f}  p99={summary['p99'] * 1000:8.3f}  max={summary['max'] * 1000:8.3f} ms")
+        for direction, data in self.snapshot().items():
+            print(direction, file=file)
+            print(line("all", data["all"]), file=file)
+            for executor_number, summary in data["executors"].items():
+                print(line(f"exec {executor_number}", summary), file=file)
+
+    def reset(self):
+        """
+        Discard all recorded samples and open spans.
+        """
+        self.directions.clear()
+        self.executors.clear()
+        self.__pending.clear()
+
+tracer = LatencyTracer()
+
+__all__ = ['PMP_TO_DOT2', 'DOT2_TO_PMP', 'LatencyHistogram', 'LatencyTracer', 'tracer']
@@ -0,0 +1,172 @@
+import asyncio
+import concurrent.futures
+import dataclasses
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+SLOW_LISTENER_THRESHOLD = 0.005  # seconds
+MAX_CONCURRENT_LISTENERS = 4  # coroutine or executor listener calls running at once, per listener set
+
+INLINE = 0
+COROUTINE = 1
+EXECUTOR = 2
+
+_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+def _shared_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_CONCURRENT_LISTENERS, thread_name_prefix="listener")
+    return _executor
+
+@dataclasses.dataclass
+class ListenerTiming:
+    name: str
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    slow_calls: int = 0
+    errors: int = 0
+    dropped: int = 0  # calls not made because max_concurrent calls were already waiting to run
+    skipped: int = 0  # calls not made because no event loop was running
+
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+class ListenerSet:
+    """
+    The listeners registered for one event, with per-listener timing.
+
+    Plain functions are called inline by `dispatch`. Coroutine functions are run as tasks on the
+    event loop and functions added with `run_in_executor` run on a thread pool; both are limited
+    to `max_concurrent` calls in flight, and calls dispatched while another `max_concurrent` are
+    waiting for a slot are dropped. `dispatch` may be called from any thread.
+    """
+
+    def __init__(self, name: str, slow_threshold: float = SLOW_LISTENER_THRESHOLD, max_concurrent: int = MAX_CONCURRENT_LISTENERS):
+        self.name = name
+        self.slow_threshold = slow_threshold
+        self.max_concurrent = max_concurrent
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.timings: Dict[Callable, ListenerTiming] = {}
+        self.__listeners: List[Tuple[Callable, int]] = []
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+        self.__scheduled = 0  # coroutine and executor calls running or waiting to run
+        self.__loop_thread: Optional[int] = None
+
+    def add(self, callback: Callable, run_in_executor: bool = False):
+        if asyncio.iscoroutinefunction(callback):
+            mode = COROUTINE
+        else:
+            mode = EXECUTOR if run_in_executor else INLINE
+        self.__listeners.append((callback, mode))
+        target = getattr(callback, "func", callback)  # name functools.partial listeners after their function
+        self.timings[callback] = ListenerTiming(getattr(target, "__qualname__", repr(callback)))
+        if mode != INLINE:
+            self.bind()
+
+    def remove(self, callback: Callable):
+        for index, (listener, _) in enumerate(self.__listeners):
+            if listener == callback:
+                del self.__listeners[index]
+                self.timings.pop(callback, None)
+                return
+        raise ValueError(f"{callback!r} is not a {self.name} listener")
+
+    def bind(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Attach the event loop coroutine and executor listeners run on. Defaults to the running loop, if any.
+        """
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+        if loop is not self.loop:
+            self.loop = loop
+            self.__semaphore = None
+            self.__scheduled = 0
+            self.__loop_thread = None
+            loop.call_soon_threadsafe(self.__record_loop_thread)
+
+    def __record_loop_thread(self):
+        self.__loop_thread = threading.get_ident()
+
+    def __iter__(self) -> Iterator[Callable]:
+        return (listener for listener, _ in self.__listeners)
+
+    def __len__(self) -> int:
+        return len(self.__listeners)
+
+    def dispatch(self, *args):
+        """
+        Call every listener with `args`. Exceptions from inline listeners propagate to the caller.
+        """
+        for callback, mode in self.__listeners:
+            if mode == INLINE:
+                start = time.perf_counter()
+                try:
+                    callback(*args)
+                finally:
+                    self.__record(callback, time.perf_counter() - start)
+            elif self.loop is None:
+                self.bind()
+                if self.loop is None:
+                    timing = self.timings[callback]
+                    timing.skipped += 1
+                    if timing.skipped == 1:
+                        print(f"No event loop for {self.name} listener {timing.name}, skipping its calls")
+                    continue
+                self.__schedule(callback, mode, args)
+            elif threading.get_ident() == self.__loop_thread:
+                self.__schedule(callback, mode, args)
+            else:
+                self.loop.call_soon_threadsafe(self.__schedule, callback, mode, args)
+
+    def __schedule(self, callback: Callable, mode: int, args: tuple):
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self.__scheduled >= 2 * self.max_concurrent:
+            timing = self.timings.get(callback)
+            if timing is not None:
+                timing.dropped += 1
+                if timing.dropped == 1:
+                    print(f"{self.name} listener {timing.name} is falling behind, dropping calls")
+            return
+        self.__scheduled += 1
+        self.loop.create_task(self.__run(callback, mode, args))
+
+    async def __run(self, callback: Callable, mode: int, args: tuple):
+        try:
+            async with self.__semaphore:
+                start = time.perf_counter()
+                try:
+                    if mode == COROUTINE:
+                        await callback(*args)
+                    else:
+                        await self.loop.run_in_executor(_shared_executor(), callback, *args)
+                except Exception as e:
+                    timing = self.timings.get(callback)  # None if the listener was removed while running
+                    if timing is not None:
+                        timing.errors += 1
+                    print(f"{self.name} listener {timing.name if timing else repr(callback)} failed: {e!r}")
+                finally:
+                    self.__record(callback, time.perf_counter() - start)
+        finally:
+            self.__scheduled -= 1
+
+    def __record(self, callback: Callable, duration: float):
+        timing = self.timings.get(callback)
+        if timing is None:
+            return
+        timing.calls += 1
+        timing.total += duration
+        if duration > timing.max:
+            timing.max = duration
+        if duration > self.slow_threshold:
+            timing.slow_calls += 1
+            if timing.slow_calls == 1:
+                print(f"Slow {self.name} listener {timing.name}: {duration * 1000:.1f} ms")
+
+__all__ = ['ListenerSet', 'ListenerTiming', 'SLOW_LISTENER_THRESHOLD', 'MAX_CONCURRENT_LISTENERS']
@@ -1,135 +1,593 @@
 import asyncio
-from pmpcontroller import PMPController, PMPEvent
-from Dot2Controller import Dot2Controller, ExecutorType, ExecutorGroup
+import dataclasses
+import functools
+import math
+import os
+import random
+import signal
+import time
+from typing import Dict, List, Optional, Tuple
+from pmpcontroller import PMPController, PMPEvent, encoder_ticks
+from Dot2Controller import Dot2Controller, ShardedDot2Controller
+from latency import tracer, PMP_TO_DOT2, DOT2_TO_PMP
+from mapping import SurfaceMapping, load_mapping
+from recorder import Recorder
+from metrics import MetricsServer
+from snapshot import SnapshotWriter
+
+DOT2_ADDRESS = "127.0.0.1"
+DOT2_PASSWORD = "password"
+MAPPING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mapping.json")
+TRACE_LATENCY = False  # dumped on SIGUSR1 where available, and on exit
+ECHO_SUPPRESS_WINDOW = 0.5  # seconds console fader updates are ignored after the user last moved or touched a fader
+FADER_TOUCH_NOTE = 104  # touch sensors of faders 0-8 report as notes 104-112
+SYNC_INDICATOR_BUTTON = 86  # blue light shown while syncing
+RETRY_INITIAL_DELAY = 0.25  # seconds before the first reconnect attempt
+RETRY_MAX_DELAY = 2  # seconds, ceiling of the exponential backoff
+FADER_MAX_RATE = 50  # max fader flushes per second, at most one command per executor each
+ENCODER_WINDOW = 0.05  # seconds encoder ticks are summed before one relative command is sent per executor
+METRICS_PORT: Optional[int] = None  # serve scrape-friendly counters on http://127.0.0.1:<port>/metrics
+HUB_SURFACES: List[Tuple[str, int]] = []  # (mapping file, port index) of more Platform M+ sharing the console session
+SHARDED_POLLING = False  # poll mapping rules with their own poll_rate over separate console sessions
+SNAPSHOT_FILE: Optional[str] = None  # publish executor state here for snapshot.SnapshotReader in other processes
+RECORD_FILE: Optional[str] = None  # record console frames and MIDI input here, for replay with bench.replay
+
+
+
+class FaderCoalescer:
+    """
+    Latest-value-wins buffer of pending fader positions, keyed by executor page and number.
+
+    The page is the one shown when the fader moved, so a position queued just before a page switch
+    still goes to the executor it was meant for.
+    """
+
+    def __init__(self, max_rate: float = FADER_MAX_RATE):
+        self.min_interval = 1 / max_rate
+        self.pending: Dict[Tuple[int, int], float] = {}
+        self.last_flush = 0.0
+        self.received = 0
+        self.merged = 0  # positions overwritten before they were sent
+        self.flushed = 0
+
+    def put_nowait(self, item: Tuple[int, int, float]):
+        page_index, executor_number, normalized_value = item
+        self.received += 1
+        if (page_index, executor_number) in self.pending:
+            self.merged += 1
+        self.pending[(page_index, executor_number)] = normalized_value
+
+    def empty(self) -> bool:
+        return not self.pending
+
+    def qsize(self) -> int:
+        return len(self.pending)
+
+    def is_due(self) -> bool:
+        return bool(self.pending) and time.monotonic() - self.last_flush >= self.min_interval
+
+    def time_until_due(self) -> Optional[float]:
+        if not self.pending:
+            return None
+        return max(0.0, self.last_flush + self.min_interval - time.monotonic())
+
+    def drain(self) -> List[Tuple[int, int, float]]:
+        pending, self.pending = self.pending, {}
+        self.last_flush = time.monotonic()
+        self.flushed += len(pending)
+        return [(page_index, executor_number, value) for (page_index, executor_number), value in pending.items()]
+
+
+
+class EncoderAccumulator:
+    """
+    Sums relative encoder ticks per executor over a short window and sends each sum as one relative change.
+
+    The change for a window is `step * ticks ** acceleration`, so with an acceleration above 1 a fast
+    spin moves further per tick than a slow one. Ticks are summed per executor page, like `FaderCoalescer`,
+    and per curve, so encoders with different curves on the same executor, e.g. on two surfaces, keep their own.
+    """
+
+    def __init__(self, window: float = ENCODER_WINDOW):
+        self.window = window
+        self.pending: Dict[Tuple[int, int, float, float], int] = {}  # page, executor, step and acceleration -> ticks
+        self.first_tick = 0.0
+        self.events = 0
+        self.ticks = 0  # raw encoder detents received
+        self.commands = 0  # relative changes sent
+
+    def add(self, executor_number: int, ticks: int, step: float, acceleration: float = 1.0, page_index: int = 0):
+        if not self.pending:
+            self.first_tick = time.monotonic()
+        self.events += 1
+        self.ticks += abs(ticks)
+        key = (page_index, executor_number, step, acceleration)
+        self.pending[key] = self.pending.get(key, 0) + ticks
+
+    def empty(self) -> bool:
+        return not self.pending
+
+    def is_due(self) -> bool:
+        return bool(self.pending) and time.monotonic() - self.first_tick >= self.window
+
+    def time_until_due(self) -> Optional[float]:
+        if not self.pending:
+            return None
+        return max(0.0, self.first_tick + self.window - time.monotonic())
+
+    def drain(self) -> List[Tuple[int, int, float]]:
+        pending, self.pending = self.pending, {}
+        changes = []
+        for (page_index, executor_number, step, acceleration), ticks in pending.items():
+            if not ticks:  # turned back and forth within the window
+                if tracer.enabled:
+                    tracer.discard(PMP_TO_DOT2, executor_number)
+                continue
+            changes.append((page_index, executor_number, math.copysign(step * abs(ticks) ** acceleration, ticks)))
+        self.commands += len(changes)
+        return changes
 
 
 
-class Dot2PMPSync:
-    def __init__(self):
-        self.dot2 = Dot2Controller()
-        self.platform_m = PMPController()
-        self.dot2_fader_queue = asyncio.Queue()
-        self.dot2_button_queue = asyncio.Queue()
+class Backoff:
+    """
+    Exponential backoff with jitter: each delay is drawn from the upper half of a doubling window.
+    """
 
-        self.dot2.set_executor_groups([
-            ExecutorGroup(1, 8, ExecutorType.FADER),
-            ExecutorGroup(101, 8, ExecutorType.BUTTON),
-            ExecutorGroup(201, 8, ExecutorType.BUTTON)
-        ])
+    def __init__(self, initial: float = RETRY_INITIAL_DELAY, maximum: float = RETRY_MAX_DELAY):
+        self.initial = initial
+        self.maximum = maximum
+        self.attempts = 0
 
-        self.dot2.add_fader_event_listener(self.dot2_fader_changed)
-        self.dot2.add_button_event_listener(self.dot2_button_changed)
-        self.platform_m.add_event_listener(PMPEvent.FADER, self.pmp_fader_changed)
-        self.platform_m.add_event_listener(PMPEvent.BUTTON, self.pmp_button_changed)
+    def next(self) -> float:
+        window = min(self.maximum, self.initial * 2 ** self.attempts)
+        self.attempts += 1
+        return random.uniform(window / 2, window)
 
+    def reset(self):
+        self.attempts = 0
 
-    def map_dot2_btn_to_pmp(self, button_num):
-        if 101 <= button_num <= 108:
-            return 24 + (108 - button_num)
-        elif 201 <= button_num <= 208:
-            return 16 + (208 - button_num)
-        raise ValueError("Button number must be in the range 101-108 or 201-208")
 
 
-    def map_pmp_btn_to_dot2(self, button_num):
-        if 24 <= button_num <= 31:
-            return 108 - (button_num - 24)
-        elif 16 <= button_num <= 23:
-            return 208 - (button_num - 16)
-        raise ValueError("Button number must be in the range 16-31")
+@dataclasses.dataclass
+class ResyncStats:
+    reconnects: int = 0
+    last_duration: float = 0.0  # seconds from losing a connection to the surface being resynced
+    last_midi_messages: int = 0
+    last_console_commands: int = 0
 
 
-    def dot2_fader_changed(self, executor_number: int, is_active: bool, normalized_value: float):
-        if not self.platform_m.is_connected(): return
-        mapped_num = 8 - executor_number
-        self.platform_m.set_fader(mapped_num, normalized_value)
-        self.platform_m.set_button(mapped_num + 8, is_active)  # SOLO button lights green when fader > 0
 
+@dataclasses.dataclass
+class SyncStats:
+    wakeups: int = 0
+    wake_latency_total: float = 0.0  # seconds from first queued input to the loop handling it
+    wake_latency_max: float = 0.0
+    started: float = dataclasses.field(default_factory=time.monotonic)
+    cpu_started: float = dataclasses.field(default_factory=time.process_time)
 
-    def dot2_button_changed(self, executor_number: int, is_active: bool):
-        if not self.platform_m.is_connected(): return
-        try:
-            mapped_num = self.map_dot2_btn_to_pmp(executor_number)
-        except ValueError: return
-        self.platform_m.set_button(mapped_num, is_active)
+    def wake_latency_mean(self) -> float:
+        return self.wake_latency_total / self.wakeups if self.wakeups else 0.0
 
+    def cpu_percent(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return 100 * (time.process_time() - self.cpu_started) / elapsed if elapsed else 0.0
 
-    def pmp_fader_changed(self, fader_number: int, normalized_value: float):
-        if not self.dot2.is_connected(): return
-        mapped_num = 8 - fader_number
-        if mapped_num >= 1:
-            self.dot2_fader_queue.put_nowait([mapped_num, normalized_value])
 
 
-    def pmp_button_changed(self, button_number: int, is_pressed: bool, button_state: bool):
-        if not self.dot2.is_connected() or not is_pressed: return
-        try:
-            mapped_num = self.map_pmp_btn_to_dot2(button_number)
-        except ValueError: return
-        self.dot2_button_queue.put_nowait([mapped_num, not button_state])
+class Surface:
+    """
+    One Platform M+, the mapping of its controls and its echo suppression state.
+    """
+
+    def __init__(self, mapping: SurfaceMapping, port_index: int = 0):
+        self.mapping = mapping
+        self.platform_m = PMPController(port_index=port_index)
+        self.name = f"pmp {port_index + 1}" if port_index else "pmp"
+        self.backoff = Backoff()
+        self.disconnected_at = 0.0
+        self.connect_task: Optional[asyncio.Task] = None  # background connect of a surface other than the first
+        self.fader_touched = [False] * 9
+        self.fader_user_until = [0.0] * 9
+        self.echo_release_scheduled = [False] * 9
+
+
+
+class Dot2PMPSync:
+    def __init__(self, address: str = DOT2_ADDRESS, password: str = DOT2_PASSWORD, mapping_file: str = MAPPING_FILE,
+                 surfaces: Optional[List[Tuple[str, int]]] = None):
+        self.address = address
+        self.password = password
+        if surfaces is None:
+            surfaces = [(mapping_file, 0)] + HUB_SURFACES
+        self.surfaces = [Surface(load_mapping(path), port_index) for path, port_index in surfaces]
+        self.mapping: SurfaceMapping = self.surfaces[0].mapping
+        self.platform_m = self.surfaces[0].platform_m
+        self.dot2 = ShardedDot2Controller() if SHARDED_POLLING else Dot2Controller()
+        self.dot2_fader_queue = FaderCoalescer()
+        self.dot2_button_queue = asyncio.Queue()
+        self.dot2_encoder_queue = EncoderAccumulator()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup = asyncio.Event()
+        self.stats = SyncStats()
+        self.resync_stats = ResyncStats()
+        self.dot2_backoff = Backoff()
+        self.__disconnected_at = 0.0
+        self.__pending_since = 0.0
+        self.__event_time = 0.0
+        self.echo_window = ECHO_SUPPRESS_WINDOW
+        self.suppressed_echoes = 0
+
+        groups = []
+        for surface in self.surfaces:
+            for group in surface.mapping.executor_groups():
+                if group not in groups: groups.append(group)
+        self.dot2.retain_state_on_disconnect = True
+        self.dot2.set_executor_groups(groups)
+
+        self.dot2.add_fader_event_listener(self.dot2_fader_changed)
+        self.dot2.add_button_event_listener(self.dot2_button_changed)
+        self.dot2.add_connection_listener(self.dot2_connection_changed)
+        for surface in self.surfaces:
+            surface.platform_m.add_connection_listener(functools.partial(self.pmp_connection_changed, surface))
 
 
-    async def connect_to_pmp(self):
+    # a surface that fails to send was unplugged; its watcher reopens and resyncs it, the others carry on
+    def dot2_fader_changed(self, executor_number: int, is_active: bool, normalized_value: float):
+        shown = False
+        for surface in self.surfaces:
+            if not surface.platform_m.is_connected(): continue
+            mapped_num = surface.mapping.executor_to_fader.get(executor_number)
+            if mapped_num is None: continue
+            try:
+                if self.is_user_driven(surface, mapped_num):
+                    self.suppressed_echoes += 1
+                    self.schedule_echo_release(surface, mapped_num)
+                else:
+                    surface.platform_m.set_fader(mapped_num, normalized_value)
+                active_button = surface.mapping.fader_active_button[mapped_num]  # e.g. SOLO lights green when fader > 0
+                if active_button is not None:
+                    surface.platform_m.set_button(active_button, is_active)
+            except OSError: continue
+            shown = True
+        if shown and tracer.enabled and self.dot2.frame_time:
+            tracer.record(DOT2_TO_PMP, executor_number, time.perf_counter() - self.dot2.frame_time)
+
+
+    def dot2_button_changed(self, executor_number: int, is_active: bool):
+        shown = False
+        for surface in self.surfaces:
+            if not surface.platform_m.is_connected(): continue
+            mapped_num = surface.mapping.executor_to_button.get(executor_number)
+            if mapped_num is None: continue
+            try:
+                surface.platform_m.set_button(mapped_num, is_active)
+            except OSError: continue
+            shown = True
+        if shown and tracer.enabled and self.dot2.frame_time:
+            tracer.record(DOT2_TO_PMP, executor_number, time.perf_counter() - self.dot2.frame_time)
+
+
+    def is_user_driven(self, surface: Surface, fader_number: int) -> bool:
+        return surface.fader_touched[fader_number] or time.monotonic() < surface.fader_user_until[fader_number]
+
+
+    def schedule_echo_release(self, surface: Surface, fader_number: int):
+        if surface.echo_release_scheduled[fader_number] or not self.loop: return
+        surface.echo_release_scheduled[fader_number] = True
+        delay = max(surface.fader_user_until[fader_number] - time.monotonic(), 0) or self.echo_window
+        self.loop.call_later(delay, self.release_echo, surface, fader_number)
+
+
+    # applies the latest console position once the user has let go of the fader
+    def release_echo(self, surface: Surface, fader_number: int):
+        surface.echo_release_scheduled[fader_number] = False
+        if self.is_user_driven(surface, fader_number):
+            self.schedule_echo_release(surface, fader_number)
+            return
+        executor_number = surface.mapping.fader_source[fader_number]
+        if executor_number is None: return
+        state = self.dot2.fader_states.get(executor_number - 1)
+        if state is None or not surface.platform_m.is_connected(): return
+        try:
+            surface.platform_m.set_fader(fader_number, state["position"])
+        except OSError: pass
+
+
+    # positions moved while the console is unreachable stay queued and are sent after reconnecting
+    def pmp_fader_changed(self, surface: Surface, fader_number: int, normalized_value: float):
+        surface.fader_user_until[fader_number] = time.monotonic() + self.echo_window
+        mapped_num = surface.mapping.fader_to_executor[fader_number]
+        if mapped_num is None: return
+        self.dot2_fader_queue.put_nowait([self.dot2.page_index, mapped_num, normalized_value])
+        if tracer.enabled:
+            tracer.begin(PMP_TO_DOT2, mapped_num, self.__event_time)
+        self.notify()
+
+
+    def pmp_button_changed(self, surface: Surface, button_number: int, is_pressed: bool, button_state: bool):
+        if FADER_TOUCH_NOTE <= button_number < FADER_TOUCH_NOTE + 9:
+            fader_number = button_number - FADER_TOUCH_NOTE
+            surface.fader_touched[fader_number] = is_pressed
+            surface.fader_user_until[fader_number] = time.monotonic() + self.echo_window
+            return
+        if not self.dot2.is_connected() or not is_pressed: return
+        if button_number == surface.mapping.page_previous_button:
+            if self.dot2.page_index > 0:
+                self.dot2.set_page(self.dot2.page_index - 1)
+            return
+        if button_number == surface.mapping.page_next_button:
+            self.dot2.set_page(self.dot2.page_index + 1)
+            return
+        mapped_num = surface.mapping.button_to_executor[button_number]
+        if mapped_num is None: return
+        self.dot2_button_queue.put_nowait([self.dot2.page_index, mapped_num, not button_state])
+        if tracer.enabled:
+            tracer.begin(PMP_TO_DOT2, mapped_num, self.__event_time)
+        self.notify()
+
+
+    # relative changes are dropped while the console is unreachable, unlike absolute fader positions
+    def pmp_encoder_changed(self, surface: Surface, encoder_number: int, value: int):
+        mapped_num = surface.mapping.encoder_to_executor[encoder_number]
+        if mapped_num is None or not self.dot2.is_connected(): return
+        ticks = encoder_ticks(value)
+        if not ticks: return
+        mapping = surface.mapping
+        self.dot2_encoder_queue.add(mapped_num, ticks, mapping.encoder_step[encoder_number], mapping.encoder_acceleration[encoder_number],
+                                    self.dot2.page_index)
+        if tracer.enabled:
+            tracer.begin(PMP_TO_DOT2, mapped_num, self.__event_time)
+        self.notify()
+
+
+    # the surfaces keep their state through a console outage, only the sync light goes out; resync_surface turns it back on
+    def dot2_connection_changed(self, is_connected: bool):
+        if not is_connected:
+            if not self.__disconnected_at:
+                self.__disconnected_at = time.monotonic()
+            for surface in self.surfaces:
+                if not surface.platform_m.is_connected(): continue
+                try:
+                    surface.platform_m.set_button(SYNC_INDICATOR_BUTTON, False)
+                except OSError: pass
+        self.wakeup.set()
+
+
+    # called on the hotplug watcher thread
+    def pmp_connection_changed(self, surface: Surface, is_connected: bool):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.surface_connection_changed, surface, is_connected)
+
+
+    # a replugged surface is resynced on its own; the console session is left alone
+    def surface_connection_changed(self, surface: Surface, is_connected: bool):
+        if not is_connected:
+            surface.fader_touched = [False] * 9
+            if not surface.disconnected_at and surface.platform_m.is_reconnecting():
+                surface.disconnected_at = time.monotonic()
+                print(f"Lost {surface.name}, waiting for it to be plugged back in...")
+            return
+        if not surface.disconnected_at or not surface.platform_m.is_connected(): return
+        try:
+            midi_messages = self.resync_surface(surface)
+        except OSError: return
+        stats = self.resync_stats
+        stats.reconnects += 1
+        stats.last_duration = time.monotonic() - surface.disconnected_at
+        stats.last_midi_messages = midi_messages
+        stats.last_console_commands = 0
+        surface.disconnected_at = 0.0
+        print(f"Resynced {surface.name} after {stats.last_duration:.3f}s with {midi_messages} MIDI messages")
+
+
+    def surfaces_connected(self) -> bool:
+        return all(surface.platform_m.is_connected() for surface in self.surfaces)
+
+
+    # raises OSError
+    def resync_surface(self, surface: Surface) -> int:
+        mapping = surface.mapping
+        faders = {}
+        buttons = {SYNC_INDICATOR_BUTTON: True}
+        for executor_id in self.dot2.fader_states.ids():
+            mapped_num = mapping.executor_to_fader.get(executor_id + 1)
+            if mapped_num is None: continue
+            faders[mapped_num] = self.dot2.fader_states.positions[executor_id]
+            active_button = mapping.fader_active_button[mapped_num]
+            if active_button is not None:
+                buttons[active_button] = self.dot2.fader_states.active[executor_id] == 1
+        for executor_id in self.dot2.button_states.ids():
+            mapped_num = mapping.executor_to_button.get(executor_id + 1)
+            if mapped_num is None: continue
+            buttons[mapped_num] = self.dot2.button_states.active[executor_id] == 1
+        return surface.platform_m.apply_state(faders, buttons)
+
+
+    def notify(self):
+        if not self.__pending_since:
+            self.__pending_since = time.perf_counter()
+        self.wakeup.set()
+
+
+    async def pump_events(self, surface: Surface, event_type: PMPEvent, handler):
+        stream = surface.platform_m.events(event_type)
+        try:
+            async for event in stream:
+                self.__event_time = stream.last_timestamp
+                handler(surface, *event)
+        finally:
+            surface.platform_m.close_events(stream)
+
+
+    async def wait_for_work(self):
+        timeout = self.dot2_fader_queue.time_until_due()
+        encoder_timeout = self.dot2_encoder_queue.time_until_due()
+        if encoder_timeout is not None and (timeout is None or encoder_timeout < timeout):
+            timeout = encoder_timeout
+        if timeout is None or timeout > 0:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self.wakeup.clear()
+        self.stats.wakeups += 1
+        if self.__pending_since:
+            latency = time.perf_counter() - self.__pending_since
+            self.__pending_since = 0.0
+            self.stats.wake_latency_total += latency
+            self.stats.wake_latency_max = max(self.stats.wake_latency_max, latency)
+
+
+    # a surface the hotplug watcher is waiting for does not hold up the console side
+    async def connect_to_pmp(self, surface: Surface):
+        if surface.platform_m.is_connected() or surface.platform_m.is_reconnecting(): return True
         try:
-            self.platform_m.connect()
+            surface.platform_m.connect()
             return True
         except OSError:
             return False
 
 
     async def connect_to_dot2(self):
+        if self.dot2.is_connected(): return True
         try:
-            await self.dot2.connect("127.0.0.1", "password")
+            await self.dot2.connect(self.address, self.password)
             return True
         except OSError:
             return False
 
 
+    # input is sent to the page that was shown when it arrived, even if the page has changed since
     async def update_dot2(self):
-        while not self.dot2_fader_queue.empty():
-            executor_number, normalized_value = await self.dot2_fader_queue.get()
-            await self.dot2.set_fader(executor_number, normalized_value)
-        while not self.dot2_button_queue.empty():
-            executor_number, new_state = await self.dot2_button_queue.get()
-            await self.dot2.set_button(executor_number, new_state)
-
-
+        async with self.dot2.batch():
+            if self.dot2_fader_queue.is_due():
+                for page_index, executor_number, normalized_value in self.dot2_fader_queue.drain():
+                    await self.dot2.set_fader(executor_number, normalized_value, page_index)
+            if self.dot2_encoder_queue.is_due():
+                for page_index, executor_number, normalized_change in self.dot2_encoder_queue.drain():
+                    await self.dot2.change_fader(executor_number, normalized_change, page_index)
+            while not self.dot2_button_queue.empty():
+                page_index, executor_number, new_state = await self.dot2_button_queue.get()
+                await self.dot2.set_button(executor_number, new_state, page_index)
+
+
+    # connects all devices concurrently; a device that is already connected is left alone
+    # only the first surface is waited for; the others connect in the background, so a missing one holds nothing up
     async def try_connect(self):
+        primary = self.surfaces[0]
+        for surface in self.surfaces[1:]:
+            self.connect_in_background(surface)
         while True:
-            if not await self.connect_to_pmp(): name = "pmp"
-            elif not await self.connect_to_dot2(): name = "dot2"
-            else:
-                print("Connected, now syncing Dot2 to Platform M+")
-                self.platform_m.set_button(86,True) # blue indicator light to show sync
-                return
-            print(f"Could not connect to {name}, waiting 10s...")
-            await self.disconnect_all()
-            await asyncio.sleep(10)
+            await asyncio.gather(
+                self.connect_with_backoff(primary.name, functools.partial(self.connect_to_pmp, primary), primary.backoff),
+                self.connect_with_backoff("dot2", self.connect_to_dot2, self.dot2_backoff)
+            )
+            print("Connected, now syncing Dot2 to Platform M+")
+            try:
+                self.report_resync(sum(self.resync_surface(surface) for surface in self.surfaces if surface.platform_m.is_connected()))
+            except OSError: continue
+            return
+
+
+    def connect_in_background(self, surface: Surface):
+        if surface.connect_task is not None and not surface.connect_task.done(): return
+        surface.connect_task = asyncio.create_task(self.connect_surface(surface))
+
+
+    # a surface that connects while the console is down is resynced with the others once it is up
+    async def connect_surface(self, surface: Surface):
+        await self.connect_with_backoff(surface.name, functools.partial(self.connect_to_pmp, surface), surface.backoff)
+        if not self.dot2.is_connected() or not surface.platform_m.is_connected(): return
+        try:
+            midi_messages = self.resync_surface(surface)
+        except OSError: return
+        print(f"Connected {surface.name}, resynced with {midi_messages} MIDI messages")
+
+
+    async def connect_with_backoff(self, name: str, connect, backoff: Backoff):
+        while not await connect():
+            delay = backoff.next()
+            print(f"Could not connect to {name}, retrying in {delay:.2f}s...")
+            await asyncio.sleep(delay)
+        backoff.reset()
+
+
+    def report_resync(self, midi_messages: int):
+        if not self.__disconnected_at: return
+        stats = self.resync_stats
+        stats.reconnects += 1
+        stats.last_duration = time.monotonic() - self.__disconnected_at
+        stats.last_midi_messages = midi_messages
+        stats.last_console_commands = self.dot2_fader_queue.qsize()
+        self.__disconnected_at = 0.0
+        print(f"Resynced after {stats.last_duration:.3f}s with {stats.last_midi_messages} MIDI messages "
+              f"and {stats.last_console_commands} console commands")
 
 
-    async def disconnect_all(self):
+    async def disconnect_all(self, reset_surface: bool = True):
         await self.dot2.disconnect()
-        if self.platform_m.is_connected():
-            self.platform_m.reset()
-        self.platform_m.disconnect()
+        for surface in self.surfaces:
+            if reset_surface and surface.platform_m.is_connected():
+                surface.platform_m.reset()
+            surface.platform_m.disconnect()
 
 
     async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.stats = SyncStats()
+        tracer.enabled = TRACE_LATENCY
+        if tracer.enabled and hasattr(signal, "SIGUSR1"):
+            self.loop.add_signal_handler(signal.SIGUSR1, tracer.dump)
+        recorder = Recorder(RECORD_FILE) if RECORD_FILE else None
+        metrics = None
+        if METRICS_PORT is not None:
+            metrics = MetricsServer(self, port=METRICS_PORT)
+            print(f"Serving metrics on {await metrics.start()}")
+        self.dot2.recorder = recorder
+        self.dot2.snapshot = SnapshotWriter(SNAPSHOT_FILE) if SNAPSHOT_FILE else None
+        pumps = []
+        for surface in self.surfaces:
+            surface.platform_m.recorder = recorder
+            pumps.append(asyncio.create_task(self.pump_events(surface, PMPEvent.FADER, self.pmp_fader_changed)))
+            pumps.append(asyncio.create_task(self.pump_events(surface, PMPEvent.BUTTON, self.pmp_button_changed)))
+            pumps.append(asyncio.create_task(self.pump_events(surface, PMPEvent.ENCODER, self.pmp_encoder_changed)))
         try:
             while True:
                 await self.try_connect()
                 try:
-                    while self.platform_m.is_connected() and self.dot2.is_connected():
+                    while self.dot2.is_connected():
+                        await self.wait_for_work()
                         await self.update_dot2()
-                        await asyncio.sleep(0.005)
                 except ConnectionAbortedError:
                     pass
+                if not self.__disconnected_at:
+                    self.__disconnected_at = time.monotonic()
         finally:
+            for pump in pumps:
+                pump.cancel()
+            for surface in self.surfaces:
+                if surface.connect_task is not None:
+                    surface.connect_task.cancel()
             await self.disconnect_all()
-            exit()
+            if metrics is not None:
+                await metrics.stop()
+            if recorder is not None:
+                self.dot2.recorder = None
+                for surface in self.surfaces:
+                    surface.platform_m.recorder = None
+                recorder.close()
+            if self.dot2.snapshot is not None:
+                self.dot2.snapshot.close()
+                self.dot2.snapshot = None
+            if tracer.enabled:
+                tracer.dump()
 
 
 
 if __name__ == "__main__":
     sync = Dot2PMPSync()
-    asyncio.run(sync.run())
+    try:
+        asyncio.run(sync.run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,152 @@
+import json
+from typing import Dict, List, Optional, Tuple, Union
+from Dot2Controller import ExecutorGroup, ExecutorType
+
+SURFACE_FADERS = 9
+SURFACE_NOTES = 128
+DIRECTIONS = ("both", "to_surface", "to_console")
+ENCODER_STEP = 1.0  # percent per encoder tick
+
+class SurfaceMapping:
+    """
+    Lookup tables between dot2 executors and Platform M+ controls, compiled from a mapping file.
+
+    Every table answers unmapped controls with `None`, so per-event lookups never raise.
+    """
+
+    def __init__(self):
+        self.executor_to_fader: Dict[int, int] = {}
+        self.fader_to_executor: List[Optional[int]] = [None] * SURFACE_FADERS
+        self.fader_source: List[Optional[int]] = [None] * SURFACE_FADERS  # executor shown on each fader
+        self.fader_active_button: List[Optional[int]] = [None] * SURFACE_FADERS
+        self.executor_to_button: Dict[int, int] = {}
+        self.button_to_executor: List[Optional[int]] = [None] * SURFACE_NOTES
+        self.encoder_to_executor: List[Optional[int]] = [None] * SURFACE_NOTES  # indexed by control change number
+        self.encoder_step: List[float] = [0.0] * SURFACE_NOTES  # normalized change per tick
+        self.encoder_acceleration: List[float] = [1.0] * SURFACE_NOTES  # exponent applied to the ticks of one window
+        self.page_previous_button: Optional[int] = None
+        self.page_next_button: Optional[int] = None
+        self.groups: List[ExecutorGroup] = []
+
+    def executor_groups(self) -> List[ExecutorGroup]:
+        """
+        Returns:
+            `groups (List[ExecutorGroup])`: The executor ranges the mapping needs from the console.
+        """
+        return list(self.groups)
+
+    @classmethod
+    def compile(cls, config: Dict) -> "SurfaceMapping":
+        """
+        Build the lookup tables from a parsed mapping file.
+
+        Args:
+            `config (Dict)`: The mapping, with `faders`, `buttons` and `encoders` lists of rules and optional `pages` buttons.
+                A rule's optional `poll_rate` sets how often its executors are polled in sharded mode. Encoder rules
+                take a `step` in percent per tick and an `acceleration` exponent, 1 for none.
+
+        Returns:
+            `mapping (SurfaceMapping)`: The compiled mapping.
+
+        Raises:
+            `ValueError`: If a rule is malformed or maps a control outside the surface.
+        """
+        mapping = cls()
+        for rule in config.get("faders", []):
+            direction = _direction(rule)
+            active_offset = rule.get("active_button_offset")
+            for executor_number, fader_number in _pairs(rule, SURFACE_FADERS):
+                if direction != "to_console":
+                    mapping.executor_to_fader[executor_number] = fader_number
+                    mapping.fader_source[fader_number] = executor_number
+                if direction != "to_surface":
+                    mapping.fader_to_executor[fader_number] = executor_number
+                if active_offset is not None:
+                    mapping.fader_active_button[fader_number] = _check(fader_number + active_offset, SURFACE_NOTES, "button")
+            mapping.__add_group(rule, ExecutorType.FADER)
+        for rule in config.get("buttons", []):
+            direction = _direction(rule)
+            for executor_number, button_number in _pairs(rule, SURFACE_NOTES):
+                if direction != "to_console":
+                    mapping.executor_to_button[executor_number] = button_number
+                if direction != "to_surface":
+                    mapping.button_to_executor[button_number] = executor_number
+            mapping.__add_group(rule, ExecutorType.BUTTON)
+        for rule in config.get("encoders", []):
+            step = _positive(rule.get("step", ENCODER_STEP), "Encoder step")
+            acceleration = _positive(rule.get("acceleration", 1.0), "Encoder acceleration")
+            for executor_number, encoder_number in _pairs(rule, SURFACE_NOTES, "encoder"):
+                mapping.encoder_to_executor[encoder_number] = executor_number
+                mapping.encoder_step[encoder_number] = step / 100
+                mapping.encoder_acceleration[encoder_number] = acceleration
+        pages = config.get("pages", {})
+        if "previous" in pages:
+            mapping.page_previous_button = _check(pages["previous"], SURFACE_NOTES, "button")
+        if "next" in pages:
+            mapping.page_next_button = _check(pages["next"], SURFACE_NOTES, "button")
+        return mapping
+
+    def __add_group(self, rule: Dict, executor_type: ExecutorType):
+        first, last = _range(rule["executors"])
+        poll_rate = rule.get("poll_rate")
+        if poll_rate is not None:
+            _positive(poll_rate, "Poll rate")
+        self.groups.append(ExecutorGroup(min(first, last), abs(last - first) + 1, executor_type, poll_rate))
+
+def _range(value: Union[int, List[int]]) -> Tuple[int, int]:
+    if isinstance(value, int):
+        return value, value
+    if isinstance(value, list) and len(value) == 2 and all(isinstance(v, int) for v in value):
+        return value[0], value[1]
+    raise ValueError(f"Expected a number or a [first, last] range, got {value!r}")
+
+def _direction(rule: Dict) -> str:
+    direction = rule.get("direction", "both")
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Direction must be one of {', '.join(DIRECTIONS)}, got {direction!r}")
+    return direction
+
+def _positive(value: Union[int, float], name: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"{name} must be a positive number, got {value!r}")
+    return float(value)
+
+def _check(number: int, limit: int, name: str) -> int:
+    if not 0 <= number < limit:
+        raise ValueError(f"Surface {name} {number} is out of range 0-{limit - 1}")
+    return number
+
+def _pairs(rule: Dict, surface_limit: int, name: Optional[str] = None) -> List[Tuple[int, int]]:
+    executor_first, executor_last = _range(rule["executors"])
+    surface_first, surface_last = _range(rule["surface"])
+    if abs(executor_last - executor_first) != abs(surface_last - surface_first):
+        raise ValueError(f"Executor range {rule['executors']} and surface range {rule['surface']} differ in length")
+    if executor_first < 1 or executor_last < 1:
+        raise ValueError("Executor must be positive")
+    executor_step = 1 if executor_last >= executor_first else -1
+    surface_step = 1 if surface_last >= surface_first else -1
+    count = abs(executor_last - executor_first) + 1
+    name = name or ("fader" if surface_limit == SURFACE_FADERS else "button")
+    return [
+        (executor_first + i * executor_step, _check(surface_first + i * surface_step, surface_limit, name))
+        for i in range(count)
+    ]
+
+def load_mapping(path: str) -> SurfaceMapping:
+    """
+    Load and compile a mapping file.
+
+    Args:
+        `path (str)`: Path to the JSON mapping file.
+
+    Returns:
+        `mapping (SurfaceMapping)`: The compiled mapping.
+
+    Raises:
+        `OSError`: If the file cannot be read.
+        `ValueError`: If the file is not a valid mapping.
+    """
+    with open(path) as file:
+        return SurfaceMapping.compile(json.load(file))
+
+__all__ = ['SurfaceMapping', 'load_mapping']
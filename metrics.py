@@ -0,0 +1,142 @@
+from typing import Callable, List, Optional, Tuple
+from aiohttp import web
+from listeners import ListenerSet
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PATH = "/metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "dot2pmp_"
+
+# name, type, help, value of a Dot2PMPSync; read only when scraped
+METRICS: List[Tuple[str, str, str, Callable]] = [
+    ("dot2_connected", "gauge", "Whether the console session is logged in.", lambda sync: int(sync.dot2.is_connected())),
+    ("pmp_connected", "gauge", "Whether every Platform M+ is open.", lambda sync: int(sync.surfaces_connected())),
+    ("surfaces", "gauge", "Platform M+ driven from the console session.", lambda sync: len(sync.surfaces)),
+    ("poll_rate", "gauge", "Smoothed playbacks responses per second.", lambda sync: sync.dot2.poll_stats.poll_rate),
+    ("polls_total", "counter", "Playbacks responses processed.", lambda sync: sync.dot2.poll_stats.polls),
+    ("poll_timeouts_total", "counter", "Playbacks requests that got no response in time.", lambda sync: sync.dot2.poll_stats.timeouts),
+    ("identical_frames_total", "counter", "Playbacks responses skipped because the frame repeated.", lambda sync: sync.dot2.poll_stats.identical_frames),
+    ("ws_frames_in_total", "counter", "Websocket text frames received from the console.", lambda sync: sync.dot2.frames_in),
+    ("ws_frames_out_total", "counter", "Websocket text frames sent to the console.", lambda sync: sync.dot2.frames_out),
+    ("console_commands_total", "counter", "Commands sent to the console.", lambda sync: sync.dot2.batch_stats.commands),
+    ("midi_in_total", "counter", "MIDI messages received from all Platform M+.", lambda sync: sum(surface.platform_m.messages_in for surface in sync.surfaces)),
+    ("midi_out_total", "counter", "MIDI messages sent to all Platform M+.", lambda sync: sum(surface.platform_m.messages_out for surface in sync.surfaces)),
+    ("fader_queue_depth", "gauge", "Executors with a fader position waiting to be sent.", lambda sync: sync.dot2_fader_queue.qsize()),
+    ("button_queue_depth", "gauge", "Button presses waiting to be sent.", lambda sync: sync.dot2_button_queue.qsize()),
+    ("encoder_ticks_total", "counter", "Encoder detents received from all Platform M+.", lambda sync: sync.dot2_encoder_queue.ticks),
+    ("encoder_commands_total", "counter", "Relative changes sent to the console for encoder input.", lambda sync: sync.dot2_encoder_queue.commands),
+    ("reconnects_total", "counter", "Times both devices were reconnected and the surface resynced.", lambda sync: sync.resync_stats.reconnects),
+    ("suppressed_echoes_total", "counter", "Console fader updates ignored while the user moved the fader.", lambda sync: sync.suppressed_echoes),
+    ("rtt_seconds", "gauge", "Smoothed round trip time of playbacks requests.", lambda sync: sync.dot2.rtt_stats.smoothed),
+    ("rtt_last_seconds", "gauge", "Round trip time of the last playbacks request.", lambda sync: sync.dot2.rtt_stats.last),
+    ("rtt_max_seconds", "gauge", "Largest round trip time of playbacks requests this session.", lambda sync: sync.dot2.rtt_stats.max),
+    ("cpu_percent", "gauge", "Process CPU time as a percentage of wall time since start.", lambda sync: sync.stats.cpu_percent()),
+]
+
+LISTENER_METRICS: List[Tuple[str, str, str]] = [
+    ("listener_calls_total", "counter", "Listener calls."),
+    ("listener_seconds_total", "counter", "Seconds spent in listener calls."),
+    ("listener_max_seconds", "gauge", "Longest listener call."),
+    ("listener_slow_calls_total", "counter", "Listener calls slower than the slow listener threshold."),
+    ("listener_errors_total", "counter", "Listener calls that raised."),
+    ("listener_dropped_total", "counter", "Listener calls dropped because too many were already waiting to run."),
+]
+
+SEND_METRICS: List[Tuple[str, str, str]] = [
+    ("send_queue_depth", "gauge", "Outgoing items waiting to be written to the console."),
+    ("send_queue_max_depth", "gauge", "Most outgoing items waiting at once."),
+    ("send_items_total", "counter", "Outgoing items written to the console."),
+    ("send_dropped_total", "counter", "Outgoing items superseded by a newer one before they were written."),
+    ("send_wait_seconds_total", "counter", "Seconds outgoing items waited to be written."),
+    ("send_wait_max_seconds", "gauge", "Longest wait of an outgoing item."),
+]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def render_metrics(sync) -> str:
+    """
+    Render the health of a running bridge in the Prometheus text exposition format.
+
+    Args:
+        `sync (Dot2PMPSync)`: The bridge to report on.
+
+    Returns:
+        `text (str)`: One sample per line, with `# HELP` and `# TYPE` comments.
+    """
+    lines = []
+    for name, metric_type, help_text, value in METRICS:
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {metric_type}")
+        lines.append(f"{PREFIX}{name} {value(sync)}")
+
+    listener_sets: List[ListenerSet] = [sync.dot2.fader_event_listeners, sync.dot2.button_event_listeners]
+    for surface in sync.surfaces:
+        listener_sets.extend(surface.platform_m.event_callbacks.values())
+    for index, (name, metric_type, help_text) in enumerate(LISTENER_METRICS):
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {metric_type}")
+        for listeners in listener_sets:
+            for timing in listeners.timings.values():
+                value = (timing.calls, timing.total, timing.max, timing.slow_calls, timing.errors, timing.dropped)[index]
+                lines.append(f"{PREFIX}{name}{{event=\"{_escape(listeners.name)}\",listener=\"{_escape(timing.name)}\"}} {value}")
+    for index, (name, metric_type, help_text) in enumerate(SEND_METRICS):
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {metric_type}")
+        for priority, stats in sync.dot2.send_stats.items():
+            value = (stats.depth, stats.max_depth, stats.sent, stats.dropped, stats.wait_total, stats.wait_max)[index]
+            lines.append(f"{PREFIX}{name}{{class=\"{priority.name.lower()}\"}} {value}")
+    lines.append("")
+    return "\n".join(lines)
+
+class MetricsServer:
+    """
+    A local HTTP endpoint serving `render_metrics` at `/metrics`, for scraping while the bridge runs headless.
+    """
+
+    def __init__(self, sync, host: str = METRICS_HOST, port: int = 0):
+        """
+        Args:
+            `sync (Dot2PMPSync)`: The bridge to report on.
+            `host (str, optional)`: The address to listen on. Defaults to localhost.
+            `port (int, optional)`: The port to listen on, 0 for any free port. Defaults to 0.
+        """
+        self.sync = sync
+        self.host = host
+        self.port = port
+        self.scrapes = 0
+        self.__runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> str:
+        """
+        Start serving.
+
+        Returns:
+            `url (str)`: The URL of the metrics page.
+
+        Raises:
+            `OSError`: If the port cannot be bound.
+        """
+        app = web.Application()
+        app.router.add_get(METRICS_PATH, self.__handle)
+        self.__runner = web.AppRunner(app)
+        await self.__runner.setup()
+        site = web.TCPSite(self.__runner, self.host, self.port)
+        try:
+            await site.start()
+        except OSError:
+            await self.stop()
+            raise
+        self.port = self.__runner.addresses[0][1]
+        return f"http://{self.host}:{self.port}{METRICS_PATH}"
+
+    async def stop(self):
+        if self.__runner:
+            await self.__runner.cleanup()
+            self.__runner = None
+
+    async def __handle(self, request: web.Request) -> web.Response:
+        self.scrapes += 1
+        return web.Response(body=render_metrics(self.sync).encode(), headers={"Content-Type": CONTENT_TYPE})
+
+__all__ = ['MetricsServer', 'render_metrics']
@@ -1,7 +1,14 @@
 import rtmidi
+import asyncio
+import re
+import threading
 from typing import Callable, Dict, List, Tuple
 from enum import Enum, auto
 import time
+from array import array
+from latency import tracer
+from listeners import ListenerSet
+from recorder import MIDI_MESSAGE
 
 PORT_NAME = "Platform M+"
 NOTE_ON = 0x90
@@ -12,6 +19,39 @@ VELOCITY_OFF = 0
 MAX_7BIT = 0x7F
 # MAX_14BIT = 16383
 MAX_DEVICE_VALUE = 14896 # The device sends a max value of 14896
+EVENT_BUFFER_SIZE = 256
+FADER_DEADBAND = 0.002 # Smallest normalized change worth moving a motor fader for
+FADER_MAX_RATE = 60 # Motor fader updates per second, per fader
+HOTPLUG_INTERVAL = 0.1 # Seconds between checks for the device being unplugged or plugged back in
+PORT_NUMBER = re.compile(r"\s+\d+$") # WinMM appends the port number to the device name
+ENCODER_DIRECTION_BIT = 0x40 # Relative encoder values set this bit when turned counter-clockwise
+ENCODER_TICKS_MASK = 0x3F
+
+def device_name(port_name: str) -> str:
+    """
+    Strip the port number some backends append to a port name, which changes when another device is unplugged.
+
+    Args:
+        `port_name (str)`: The name of a MIDI port.
+
+    Returns:
+        `device_name (str)`: The port name without the trailing port number.
+    """
+    return PORT_NUMBER.sub("", port_name)
+
+def encoder_ticks(value: int) -> int:
+    """
+    Decode the value of a relative encoder event.
+
+    Args:
+        `value (int)`: The raw control change value, 1-63 clockwise and 65-127 counter-clockwise.
+
+    Returns:
+        `ticks (int)`: The signed number of detents turned, negative counter-clockwise.
+    """
+    if value & ENCODER_DIRECTION_BIT:
+        return -(value & ENCODER_TICKS_MASK)
+    return value & ENCODER_TICKS_MASK
 
 class PMPEvent(Enum):
     """
@@ -21,33 +61,157 @@ class PMPEvent(Enum):
     BUTTON = auto()
     ENCODER = auto()
 
+class PMPEventStream:
+    """
+    An async iterator over the events of one `PMPEvent` type.
+
+    Events are handed from the rtmidi callback thread to the event loop through a preallocated
+    ring buffer. When the buffer is full, fader events keep only the newest value per fader
+    until there is room again, and other events are dropped.
+    """
+
+    def __init__(self, event_type: PMPEvent, loop: asyncio.AbstractEventLoop, size: int = EVENT_BUFFER_SIZE):
+        self.event_type = event_type
+        self.loop = loop
+        self.size = size
+        self.dropped = 0
+        self.max_depth = 0
+        self.closed = False
+        self.last_timestamp = 0.0  # perf_counter() arrival time of the last event read, 0 when not tracing
+        self.__buffer: List[tuple] = [None] * size
+        self.__timestamps = array('d', bytes(8 * size))
+        self.__head = 0
+        self.__count = 0
+        self.__overflow: Dict[int, tuple] = {}
+        self.__lock = threading.Lock()
+        self.__ready = asyncio.Event()
+        self.__wake_pending = False
+
+    def depth(self) -> int:
+        """
+        Returns:
+            `depth (int)`: The number of events waiting to be read.
+        """
+        return self.__count + len(self.__overflow)
+
+    def push(self, event: tuple, timestamp: float = 0.0):
+        """
+        Queue an event. Safe to call from any thread.
+
+        Args:
+            `event (tuple)`: The callback arguments of the event, starting with the control number.
+            `timestamp (float, optional)`: The arrival time of the event. Defaults to 0.
+        """
+        with self.__lock:
+            if self.event_type == PMPEvent.FADER and event[0] in self.__overflow:
+                del self.__overflow[event[0]]
+                self.dropped += 1
+            if self.__count < self.size:
+                tail = (self.__head + self.__count) % self.size
+                self.__buffer[tail] = event
+                self.__timestamps[tail] = timestamp
+                self.__count += 1
+            elif self.event_type == PMPEvent.FADER:
+                self.__overflow[event[0]] = (event, timestamp)
+            else:
+                self.dropped += 1
+                return
+            self.max_depth = max(self.max_depth, self.__count + len(self.__overflow))
+            if self.__wake_pending:
+                return
+            self.__wake_pending = True
+        self.loop.call_soon_threadsafe(self.__ready.set)
+
+    def close(self):
+        """
+        End the iteration once the queued events have been read. Safe to call from any thread.
+        """
+        self.closed = True
+        self.loop.call_soon_threadsafe(self.__ready.set)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> tuple:
+        while True:
+            with self.__lock:
+                if self.__count:
+                    event = self.__buffer[self.__head]
+                    self.last_timestamp = self.__timestamps[self.__head]
+                    self.__buffer[self.__head] = None
+                    self.__head = (self.__head + 1) % self.size
+                    self.__count -= 1
+                    return event
+                if self.__overflow:
+                    event, self.last_timestamp = self.__overflow.pop(next(iter(self.__overflow)))
+                    return event
+                if self.closed:
+                    raise StopAsyncIteration
+                self.__wake_pending = False
+                self.__ready.clear()
+            await self.__ready.wait()
+
 class PMPController:
     """
     A class to interact with the Icon Platform M+ MIDI control surface.
     """
 
-    def __init__(self, sync_faders: bool = False):
+    def __init__(self, sync_faders: bool = False, fader_deadband: float = FADER_DEADBAND, fader_max_rate: float = FADER_MAX_RATE, port_index: int = 0):
         """
         Initialize the Platform M+ Controller.
 
         Args:
             `sync_faders (bool, optional)`: Whether the fader positions should sync with user movement. Defaults to False.
+            `fader_deadband (float, optional)`: Fader changes smaller than this are not sent. Defaults to 0.002.
+            `fader_max_rate (float, optional)`: Maximum updates per second sent to each motor fader. Defaults to 60.
+            `port_index (int, optional)`: Which of several connected Platform M+ to open on the first connect, counted in port order.
+                Later connects and reconnects only open a free port of the device found then. Defaults to 0.
         """
+        self.port_index = port_index
         self.connected = False
         self.sync_faders = sync_faders
+        self.fader_deadband = fader_deadband
+        self.fader_interval = 1 / fader_max_rate
+        self.fader_messages_sent = 0
+        self.fader_messages_skipped = 0
+        self.__fader_sent: List[float] = [None] * 9
+        self.__fader_sent_at = [0.0] * 9
+        self.__fader_pending: List[float] = [None] * 9
+        self.__output_lock = threading.Condition()
+        self.__fader_writer = None
         self.midi_in = rtmidi.MidiIn()
         self.midi_out = rtmidi.MidiOut()
         self.fader_positions = [0] * 9
         self.button_states = {}
-        self.event_callbacks: Dict[PMPEvent, List[Callable]] = {
+        self.surface_known = False  # whether fader_positions and button_states match what the device shows
+        self.messages_in = 0
+        self.messages_out = 0
+        self.event_callbacks: Dict[PMPEvent, ListenerSet] = {
+            PMPEvent.FADER: ListenerSet("Platform M+ fader"),
+            PMPEvent.BUTTON: ListenerSet("Platform M+ button"),
+            PMPEvent.ENCODER: ListenerSet("Platform M+ encoder")
+        }
+        self.event_streams: Dict[PMPEvent, List[PMPEventStream]] = {
             PMPEvent.FADER: [],
             PMPEvent.BUTTON: [],
             PMPEvent.ENCODER: []
         }
+        self.recorder = None  # a recorder.Recorder that incoming MIDI messages are written to
+        self.connection_listeners = ListenerSet("Platform M+ connection")
+        self.hotplug_interval = HOTPLUG_INTERVAL
+        self.reconnects = 0
+        self.__in_port: Tuple[int, str] = None  # cached index and name of the open ports
+        self.__out_port: Tuple[int, str] = None
+        self.__port_lock = threading.Lock()
+        self.__watcher = None
+        self.__stop_watching = threading.Event()
+        self.__message_time = 0.0
 
     def connect(self) -> Tuple[int, int]:
         """
-        Connect to the Platform M+ MIDI device.
+        Connect to the Platform M+ MIDI device and start watching for it being unplugged and plugged back in.
+        While watching, the ports are closed as soon as the device disappears and reopened when it returns,
+        and `connection_listeners` are told about both.
 
         Returns:
             `in_port, out_port (Tuple[int, int])`: A tuple containing the input and output port numbers.
@@ -55,29 +219,130 @@ class PMPController:
         Raises:
             `OSError`: If the Platform M+ device is not found.
         """
-        in_port = self.__find_port(self.midi_in)
-        out_port = self.__find_port(self.midi_out)
-        if in_port is None or out_port is None:
-            raise OSError("Platform M+ not found")
-        self.midi_in.open_port(in_port)
-        self.midi_out.open_port(out_port)
-        self.midi_in.set_callback(self.__process_midi_message)
-        self.connected = True
+        for listeners in (*self.event_callbacks.values(), self.connection_listeners):
+            listeners.bind()
+        with self.__port_lock:
+            in_port, out_port = self.__open_ports()
+        self.__set_connected(True)
+        self.__start_watcher()
         return (in_port, out_port)
 
-    def __find_port(self, midi_obj) -> int:
-        for i, port in enumerate(midi_obj.get_ports()):
-            if PORT_NAME in port:
-                return i
-        return None
-    
+    # must hold __port_lock, raises OSError
+    def __open_ports(self) -> Tuple[int, int]:
+        candidates = list(zip(self.__find_ports(self.midi_in, self.__in_port), self.__find_ports(self.midi_out, self.__out_port)))
+        if not candidates:
+            raise OSError("Platform M+ not found")
+        # the output lock keeps set_button and the fader writer off the port while it is swapped
+        with self.__output_lock:
+            for in_port, out_port in candidates:
+                self.__close_ports()
+                try:
+                    self.midi_in.open_port(in_port[0])
+                    self.midi_out.open_port(out_port[0])
+                except rtmidi.SystemError:
+                    continue
+                break
+            else:
+                self.__close_ports()
+                raise OSError("Platform M+ could not be opened")
+            self.__in_port, self.__out_port = in_port, out_port
+            self.midi_in.set_callback(self.__process_midi_message)
+            self.__fader_sent = [None] * 9
+            self.__fader_pending = [None] * 9
+        self.surface_known = False
+        return (in_port[0], out_port[0])
+
+    # must hold __port_lock, takes __output_lock after it
+    def __close_ports(self):
+        with self.__output_lock:
+            self.midi_in.cancel_callback()
+            self.midi_in.close_port()
+            self.midi_out.close_port()
+
+    # port_index picks the device on the first connect; after that any port of the same device may be opened,
+    # the cached one first. Identical surfaces only differ in the port number, which shifts when one is unplugged,
+    # but a port can only be opened once, so in a hub an unplugged surface waits instead of taking over another one
+    def __find_ports(self, midi_obj, cached: Tuple[int, str]) -> List[Tuple[int, str]]:
+        ports = midi_obj.get_ports()
+        if cached is not None:
+            matches = [(i, port) for i, port in enumerate(ports) if device_name(port) == device_name(cached[1])]
+            matches.sort(key=lambda match: match != cached)
+            return matches
+        matches = [(i, port) for i, port in enumerate(ports) if PORT_NAME in port]
+        return matches[self.port_index:self.port_index + 1]
+
+    # when the port number shifted there is no telling which of several identical surfaces went away,
+    # the one that did is noticed as soon as a message to it fails
+    def __port_present(self) -> bool:
+        if self.__out_port is None:
+            return False
+        index, name = self.__out_port
+        ports = self.midi_out.get_ports()
+        if index < len(ports) and ports[index] == name:
+            return True
+        return any(device_name(port) == device_name(name) for port in ports)
+
     def is_connected(self) -> bool:
+        """
+        Returns:
+            `connected (bool)`: Whether the device is open. Turns False within `hotplug_interval` of it being unplugged.
+        """
         return self.connected
 
+    def is_reconnecting(self) -> bool:
+        """
+        Returns:
+            `reconnecting (bool)`: Whether the device was lost and is reopened as soon as it is plugged back in.
+        """
+        return not self.connected and self.__watcher is not None and not self.__stop_watching.is_set()
+
+    def __set_connected(self, connected: bool):
+        if self.connected == connected:
+            return
+        self.connected = connected
+        self.connection_listeners.dispatch(connected)
+
+    def __start_watcher(self):
+        if self.__watcher is not None and self.__watcher.is_alive():
+            return
+        self.__stop_watching.clear()
+        self.__watcher = threading.Thread(target=self.__watch_ports, name="PMPHotplugWatcher", daemon=True)
+        self.__watcher.start()
+
+    def __watch_ports(self):
+        while not self.__stop_watching.wait(self.hotplug_interval):
+            with self.__port_lock:
+                if self.__stop_watching.is_set():
+                    return
+                if self.connected:
+                    if self.__port_present():
+                        continue
+                    self.__close_ports()
+                else:
+                    try:
+                        self.__open_ports()
+                    except OSError:
+                        continue
+                    self.reconnects += 1
+            self.__set_connected(not self.connected)
+
     def __process_midi_message(self, message, timestanp):
         midi_message, _ = message
+        self.messages_in += 1
+        if self.recorder is not None:
+            self.recorder.record(MIDI_MESSAGE, bytes(midi_message))
+        self.feed_midi_message(midi_message)
+
+    def feed_midi_message(self, midi_message: List[int]):
+        """
+        Handle one incoming MIDI message as if the device had sent it. Used to replay recordings.
+
+        Args:
+            `midi_message (List[int])`: The status and data bytes of the message.
+        """
         if len(midi_message) != 3:
             return
+        self.__message_time = time.perf_counter() if tracer.enabled else 0.0
         status_byte, data1, data2 = midi_message
         if PITCH_BEND <= status_byte <= PITCH_BEND + 8:
             fader_number = status_byte - PITCH_BEND
@@ -93,36 +358,95 @@ class PMPController:
             normalized_value = value / MAX_DEVICE_VALUE
             if self.sync_faders:
                 self.set_fader(fader_number, normalized_value)
-            for callback in self.event_callbacks[PMPEvent.FADER]:
-                callback(fader_number, normalized_value)
+            self.event_callbacks[PMPEvent.FADER].dispatch(fader_number, normalized_value)
+            for stream in self.event_streams[PMPEvent.FADER]:
+                stream.push((fader_number, normalized_value), self.__message_time)
 
     def __handle_button(self, button_number: int, is_pressed: bool):
         button_state = self.button_states.get(button_number, False)
-        for callback in self.event_callbacks[PMPEvent.BUTTON]:
-            callback(button_number, is_pressed, button_state)
+        self.event_callbacks[PMPEvent.BUTTON].dispatch(button_number, is_pressed, button_state)
+        for stream in self.event_streams[PMPEvent.BUTTON]:
+            stream.push((button_number, is_pressed, button_state), self.__message_time)
 
     def __handle_encoder(self, encoder_number: int, value: int):
-        for callback in self.event_callbacks[PMPEvent.ENCODER]:
-            callback(encoder_number, value)
+        self.event_callbacks[PMPEvent.ENCODER].dispatch(encoder_number, value)
+        for stream in self.event_streams[PMPEvent.ENCODER]:
+            stream.push((encoder_number, value), self.__message_time)
 
     def set_fader(self, fader_number: int, normalized_position: float):
         """
         Set the position of a fader.
 
+        Changes within the deadband of the last sent position are skipped. Updates faster than the
+        maximum rate are held back and only the newest held value is sent once the fader is due.
+
         Args:
             `fader_number (int)`: The number of the fader (0-8).
             `normalized_position (float)`: The position of the fader, between 0 and 1.
         """
-        if 0 <= fader_number < 9:
-            value = int(normalized_position * MAX_DEVICE_VALUE)
-            msb = (value >> 7) & MAX_7BIT
-            lsb = value & MAX_7BIT
-            try:
-                self.midi_out.send_message([PITCH_BEND + fader_number, lsb, msb])
-            except rtmidi.SystemError:
-                self.connected = False
-                raise OSError("Not connected to Platform M+")
+        if not 0 <= fader_number < 9:
+            return
+        with self.__output_lock:
+            self.fader_positions[fader_number] = normalized_position
+            last_sent = self.__fader_sent[fader_number]
+            if last_sent is not None and abs(normalized_position - last_sent) < self.fader_deadband:
+                self.__fader_pending[fader_number] = None
+                self.fader_messages_skipped += 1
+                return
+            if time.monotonic() - self.__fader_sent_at[fader_number] < self.fader_interval:
+                if self.__fader_pending[fader_number] is not None:
+                    self.fader_messages_skipped += 1
+                self.__fader_pending[fader_number] = normalized_position
+                self.__start_fader_writer()
+                self.__output_lock.notify()
+                return
+            self.__send_fader(fader_number, normalized_position)
+
+    # raises OSError
+    def __force_fader(self, fader_number: int, normalized_position: float):
+        with self.__output_lock:
             self.fader_positions[fader_number] = normalized_position
+            self.__fader_pending[fader_number] = None
+            self.__send_fader(fader_number, normalized_position)
+
+    # must hold __output_lock, raises OSError
+    def __send_fader(self, fader_number: int, normalized_position: float):
+        value = int(normalized_position * MAX_DEVICE_VALUE)
+        msb = (value >> 7) & MAX_7BIT
+        lsb = value & MAX_7BIT
+        try:
+            self.midi_out.send_message([PITCH_BEND + fader_number, lsb, msb])
+        except rtmidi.SystemError:
+            self.__set_connected(False)
+            raise OSError("Not connected to Platform M+")
+        self.messages_out += 1
+        self.fader_messages_sent += 1
+        self.__fader_sent[fader_number] = normalized_position
+        self.__fader_sent_at[fader_number] = time.monotonic()
+
+    def __start_fader_writer(self):
+        if self.__fader_writer is None:
+            self.__fader_writer = threading.Thread(target=self.__write_pending_faders, name="PMPFaderWriter", daemon=True)
+            self.__fader_writer.start()
+
+    def __write_pending_faders(self):
+        with self.__output_lock:
+            while True:
+                timeout = None
+                now = time.monotonic()
+                for fader_number, normalized_position in enumerate(self.__fader_pending):
+                    if normalized_position is None:
+                        continue
+                    due = self.__fader_sent_at[fader_number] + self.fader_interval
+                    if due > now:
+                        timeout = due - now if timeout is None else min(timeout, due - now)
+                        continue
+                    self.__fader_pending[fader_number] = None
+                    try:
+                        self.__send_fader(fader_number, normalized_position)
+                    except OSError:
+                        pass
+                self.__output_lock.wait(timeout)
 
     def set_button(self, button_number: int, button_state: bool):
         """
@@ -134,11 +458,13 @@ class PMPController:
         """
         self.button_states[button_number] = button_state
         velocity = VELOCITY_ON if button_state else VELOCITY_OFF
-        try:
-            self.midi_out.send_message([NOTE_ON, button_number, velocity])
-        except rtmidi.SystemError:
-            self.connected = False
-            raise OSError("Not connected to Platform M+")
+        with self.__output_lock:
+            try:
+                self.midi_out.send_message([NOTE_ON, button_number, velocity])
+            except rtmidi.SystemError:
+                self.__set_connected(False)
+                raise OSError("Not connected to Platform M+")
+            self.messages_out += 1
         
     def set_fader_sync(self, sync_faders: bool):
         """
@@ -181,24 +507,57 @@ class PMPController:
         Reset all faders to 0 and all buttons to off.
         """
         for i in range(0, 9):
-            self.set_fader(i, 0)
+            self.__force_fader(i, 0)
         for i in range(0, 100):
             self.set_button(i, False)
+        self.surface_known = True
 
-    def add_event_listener(self, event_type: PMPEvent, callback: Callable):
+    # raises OSError
+    def apply_state(self, faders: Dict[int, float], buttons: Dict[int, bool]) -> int:
+        """
+        Bring the surface to a target state, sending only the faders and buttons that differ from what
+        the device is known to show. If the device state is unknown, for example after connecting, every
+        given control is sent.
+
+        Args:
+            `faders (Dict[int, float])`: Target positions by fader number.
+            `buttons (Dict[int, bool])`: Target states by button number.
+
+        Returns:
+            `messages (int)`: The number of MIDI messages sent.
+        """
+        sent = self.messages_out
+        for fader_number, normalized_position in faders.items():
+            if not self.surface_known:
+                self.__force_fader(fader_number, normalized_position)
+            elif self.fader_positions[fader_number] != normalized_position:
+                self.set_fader(fader_number, normalized_position)
+        for button_number, button_state in buttons.items():
+            if not self.surface_known or self.button_states.get(button_number, False) != button_state:
+                self.set_button(button_number, button_state)
+        self.surface_known = True
+        return self.messages_out - sent
+
+    def add_event_listener(self, event_type: PMPEvent, callback: Callable, run_in_executor: bool = False):
         """
         Add an event listener for a specific event type.
 
+        Plain functions are called on the rtmidi thread and should return quickly. Coroutine functions
+        are run on the event loop the controller was connected from, and functions added with
+        `run_in_executor` on a thread pool, so they never hold up MIDI input. Slow listeners are
+        reported once and timed in `event_callbacks[event_type].timings`.
+
         Args:
             `event_type (PMPEvent)`: The type of event to listen for.
-            `callback (Callable)`: The function to call when the event occurs.
+            `callback (Callable)`: The function or coroutine function to call when the event occurs.
+            `run_in_executor (bool, optional)`: Run a plain function on a thread pool. Defaults to False.
 
         Callback Signatures:
             - Fader:    `callback(fader_number: int, normalized_value: float)`
             - Button:    `callbacks(button_number: int, is_pressed: bool, button_state: bool)`
-            - Encoder:    `callback(encoder_number: int, value: int)`
+            - Encoder:    `callback(encoder_number: int, value: int)`, decoded with `encoder_ticks`
         """
-        self.event_callbacks[event_type].append(callback)
+        self.event_callbacks[event_type].add(callback, run_in_executor)
 
     def remove_event_listener(self, event_type: PMPEvent, callback: Callable):
         """
@@ -210,14 +569,65 @@ class PMPController:
         """
         self.event_callbacks[event_type].remove(callback)
 
+    def events(self, event_type: PMPEvent, buffer_size: int = EVENT_BUFFER_SIZE) -> PMPEventStream:
+        """
+        Open an async stream of events for a specific event type. Must be called from the event loop
+        that will read the stream. Each event is a tuple of the listener callback arguments.
+
+        Args:
+            `event_type (PMPEvent)`: The type of event to stream.
+            `buffer_size (int, optional)`: The number of events buffered before the overflow policy applies. Defaults to 256.
+
+        Returns:
+            `stream (PMPEventStream)`: The stream, usable with `async for`.
+        """
+        stream = PMPEventStream(event_type, asyncio.get_running_loop(), buffer_size)
+        self.event_streams[event_type].append(stream)
+        return stream
+
+    def close_events(self, stream: PMPEventStream):
+        """
+        Stop feeding and close an event stream opened with `events`.
+
+        Args:
+            `stream (PMPEventStream)`: The stream to close.
+        """
+        self.event_streams[stream.event_type].remove(stream)
+        stream.close()
+
+    def add_connection_listener(self, callback: Callable, run_in_executor: bool = False):
+        """
+        Add a listener for the device being lost or reopened. Plain functions are called on the thread
+        that noticed the change, usually the hotplug watcher.
+
+        Args:
+            `callback (Callable)`: `callback(is_connected: bool)`, a function or coroutine function.
+            `run_in_executor (bool, optional)`: Run a plain function on a thread pool. Defaults to False.
+        """
+        self.connection_listeners.add(callback, run_in_executor)
+
+    def remove_connection_listener(self, callback: Callable):
+        """
+        Remove a listener added with `add_connection_listener`.
+
+        Args:
+            `callback (Callable)`: The function to remove.
+        """
+        self.connection_listeners.remove(callback)
+
     def disconnect(self):
         """
-        Disconnect from the Platform M+ device and close MIDI ports.
+        Disconnect from the Platform M+ device, stop watching for it and close MIDI ports.
         """
-        self.connected = False
+        self.__stop_watching.set()
+        if self.__watcher is not None and self.__watcher is not threading.current_thread():
+            self.__watcher.join()
+        self.__watcher = None
+        with self.__output_lock:
+            self.__fader_pending = [None] * 9
         time.sleep(0.01)
-        self.midi_in.cancel_callback()
-        self.midi_in.close_port()
-        self.midi_out.close_port()
+        with self.__port_lock:
+            self.__close_ports()
+        self.__set_connected(False)
 
-__all__ = ['PMPEvent', 'PMPController']
\ No newline at end of file
+__all__ = ['PMPEvent', 'PMPEventStream', 'PMPController', 'encoder_ticks']
\ No newline at end of file
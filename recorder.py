@@ -0,0 +1,158 @@
+import asyncio
+import collections
+import dataclasses
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+MAGIC = b"D2PMREC1"
+DOT2_FRAME = 1  # websocket text frame from the console, UTF-8
+MIDI_MESSAGE = 2  # raw MIDI message from the Platform M+
+RECORD_HEADER = struct.Struct("<BdI")  # source, seconds since the recording started, payload length
+FLUSH_INTERVAL = 0.2  # seconds between writes of the background writer
+
+class Recorder:
+    """
+    Records dot2 websocket frames and Platform M+ MIDI messages with their arrival times.
+
+    `record` only appends to an in-memory queue, so it is safe and cheap to call from the event loop
+    and the rtmidi thread. A background thread packs and writes the queued records every
+    `flush_interval` seconds.
+    """
+
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.bytes_written = 0
+        self.__started = time.perf_counter()
+        self.__pending = collections.deque()
+        self.__closed = threading.Event()
+        self.__file: BinaryIO = open(path, "wb")
+        self.__file.write(MAGIC)
+        self.__writer = threading.Thread(target=self.__write_pending, name="recorder", daemon=True)
+        self.__writer.start()
+
+    def record(self, source: int, data: bytes):
+        """
+        Queue one frame or message for writing.
+
+        Args:
+            `source (int)`: `DOT2_FRAME` or `MIDI_MESSAGE`.
+            `data (bytes)`: The encoded frame or the MIDI message bytes.
+        """
+        self.__pending.append((source, time.perf_counter() - self.__started, data))
+
+    def close(self):
+        """
+        Write everything still queued and close the file.
+        """
+        if self.__closed.is_set():
+            return
+        self.__closed.set()
+        self.__writer.join()
+        self.__file.close()
+
+    def __write_pending(self):
+        while not self.__closed.wait(self.flush_interval):
+            self.__flush()
+        self.__flush()
+
+    def __flush(self):
+        chunks = []
+        pending = self.__pending
+        while pending:
+            source, timestamp, data = pending.popleft()
+            chunks.append(RECORD_HEADER.pack(source, timestamp, len(data)))
+            chunks.append(data)
+        if chunks:
+            block = b"".join(chunks)
+            self.__file.write(block)
+            self.__file.flush()
+            self.records += len(chunks) // 2
+            self.bytes_written += len(block)
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_recording(path: str) -> Iterator[Tuple[int, float, bytes]]:
+    """
+    Read a recording written by `Recorder`.
+
+    Args:
+        `path (str)`: Path to the recording.
+
+    Returns:
+        `records (Iterator[Tuple[int, float, bytes]])`: The source, timestamp and data of each record, in order.
+
+    Raises:
+        `ValueError`: If the file is not a recording or is truncated.
+    """
+    with open(path, "rb") as file:
+        content = file.read()
+    if not content.startswith(MAGIC):
+        raise ValueError(f"{path} is not a recording")
+    offset = len(MAGIC)
+    while offset < len(content):
+        if offset + RECORD_HEADER.size > len(content):
+            raise ValueError(f"{path} is truncated")
+        source, timestamp, length = RECORD_HEADER.unpack_from(content, offset)
+        offset += RECORD_HEADER.size
+        if offset + length > len(content):
+            raise ValueError(f"{path} is truncated")
+        yield source, timestamp, content[offset:offset + length]
+        offset += length
+
+@dataclasses.dataclass
+class ReplayStats:
+    frames: int = 0
+    midi_messages: int = 0
+    duration: float = 0.0  # wall-clock seconds the replay took
+    recorded_duration: float = 0.0  # seconds between the first and last record
+
+    def rate(self) -> float:
+        return (self.frames + self.midi_messages) / self.duration if self.duration else 0.0
+
+async def replay(path: str, dot2=None, platform_m=None, speed: float = 1.0) -> ReplayStats:
+    """
+    Feed a recording into controllers, keeping the recorded timing or as fast as possible.
+
+    Args:
+        `path (str)`: Path to the recording.
+        `dot2 (Dot2Controller, optional)`: Receives the recorded websocket frames through `feed_message`.
+        `platform_m (PMPController, optional)`: Receives the recorded MIDI messages through `feed_midi_message`.
+        `speed (float, optional)`: Playback speed relative to the recording; 0 replays as fast as possible. Defaults to 1.0.
+
+    Returns:
+        `stats (ReplayStats)`: Counts and timing of the replay.
+
+    Raises:
+        `ValueError`: If the file is not a recording or is truncated.
+    """
+    stats = ReplayStats()
+    first: Optional[float] = None
+    started = time.perf_counter()
+    for source, timestamp, data in read_recording(path):
+        if first is None:
+            first = timestamp
+        stats.recorded_duration = timestamp - first
+        if speed:
+            delay = stats.recorded_duration / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        if source == DOT2_FRAME:
+            stats.frames += 1
+            if dot2 is not None:
+                await dot2.feed_message(data.decode())
+        elif source == MIDI_MESSAGE:
+            stats.midi_messages += 1
+            if platform_m is not None:
+                platform_m.feed_midi_message(list(data))
+    stats.duration = time.perf_counter() - started
+    return stats
+
+__all__ = ['Recorder', 'ReplayStats', 'read_recording', 'replay', 'DOT2_FRAME', 'MIDI_MESSAGE']
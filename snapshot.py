@@ -0,0 +1,252 @@
+import mmap
+import os
+import struct
+import tempfile
+import time
+from array import array
+from typing import Dict, Optional, Tuple
+
+MAGIC = b"D2SNAP\x00\x00"
+VERSION = 1
+SNAPSHOT_FILE = os.path.join(tempfile.gettempdir(), "dot2pmp.snapshot")
+SNAPSHOT_CAPACITY = 1024  # executors per table
+CONNECTED = 0x1
+READ_TIMEOUT = 0.5  # seconds a read keeps retrying while the writer is publishing
+# magic, version, capacity, sequence, wall-clock time of the last publish, page index, flags
+HEADER = struct.Struct("<8sIIQdII")
+SEQUENCE_OFFSET = 16
+
+def _layout(capacity: int) -> Tuple[int, int, int, int, int, int]:
+    """
+    Offsets of the fader positions, fader active, fader known, button active and button known tables,
+    and the total size, for a region holding `capacity` executors per table.
+    """
+    fader_positions = (HEADER.size + 7) // 8 * 8
+    fader_active = fader_positions + 8 * capacity
+    fader_known = fader_active + capacity
+    button_active = fader_known + capacity
+    button_known = button_active + capacity
+    return fader_positions, fader_active, fader_known, button_active, button_known, button_known + capacity
+
+class SnapshotWriter:
+    """
+    Publishes executor state to a fixed-layout memory-mapped file that other local processes read
+    with `SnapshotReader`.
+
+    Writes are guarded by a sequence counter that is odd while a publish is in progress, so readers
+    can detect and retry torn reads without any lock. Executors beyond `capacity` are not published.
+    """
+
+    def __init__(self, path: str = SNAPSHOT_FILE, capacity: int = SNAPSHOT_CAPACITY):
+        """
+        Args:
+            `path (str, optional)`: The file to map. Created or overwritten. Defaults to `dot2pmp.snapshot` in the temp directory.
+            `capacity (int, optional)`: Executors per table. Defaults to 1024.
+
+        Raises:
+            `OSError`: If the file cannot be created or mapped.
+        """
+        self.path = path
+        self.capacity = capacity
+        self.publishes = 0
+        self.truncated = 0  # publishes that left out executors beyond the capacity
+        offsets = _layout(capacity)
+        self.__file = open(path, "w+b")
+        self.__file.truncate(offsets[-1])
+        self.__map = mmap.mmap(self.__file.fileno(), offsets[-1])
+        self.__sequence = 0
+        self.__zeros = array('b', bytes(capacity))
+        view = memoryview(self.__map)
+        self.__fader_positions = view[offsets[0]:offsets[1]].cast('d')
+        self.__fader_active = view[offsets[1]:offsets[2]].cast('b')
+        self.__fader_known = view[offsets[2]:offsets[3]].cast('b')
+        self.__button_active = view[offsets[3]:offsets[4]].cast('b')
+        self.__button_known = view[offsets[4]:offsets[5]].cast('b')
+        HEADER.pack_into(self.__map, 0, MAGIC, VERSION, capacity, 0, time.time(), 0, 0)
+
+    def publish(self, fader_states, button_states, page_index: int, connected: bool):
+        """
+        Copy the current state into the shared region.
+
+        Args:
+            `fader_states (ExecutorStateStore)`: Fader positions and active flags.
+            `button_states (ExecutorStateStore)`: Button active flags.
+            `page_index (int)`: The executor page the state belongs to.
+            `connected (bool)`: Whether the console session is up.
+        """
+        self.__begin()
+        fader_count = self.__copy(fader_states, self.__fader_active, self.__fader_known, self.__fader_positions)
+        button_count = self.__copy(button_states, self.__button_active, self.__button_known)
+        if fader_count < len(fader_states.positions) or button_count < len(button_states.positions):
+            self.truncated += 1
+        struct.pack_into("<dII", self.__map, SEQUENCE_OFFSET + 8, time.time(), page_index, CONNECTED if connected else 0)
+        self.__end()
+        self.publishes += 1
+
+    def __copy(self, store, active, known, positions=None) -> int:
+        count = min(len(store.positions), self.capacity)
+        active[:count] = store.active[:count]
+        known[:count] = store.known[:count]
+        known[count:] = self.__zeros[:self.capacity - count]
+        if positions is not None:
+            positions[:count] = store.positions[:count]
+        return count
+
+    def __begin(self):
+        self.__sequence += 1
+        struct.pack_into("<Q", self.__map, SEQUENCE_OFFSET, self.__sequence)
+
+    def __end(self):
+        self.__sequence += 1
+        struct.pack_into("<Q", self.__map, SEQUENCE_OFFSET, self.__sequence)
+
+    def close(self):
+        """
+        Mark the state as disconnected and unmap the file. The file is left for readers to see.
+        """
+        if self.__map.closed:
+            return
+        self.__begin()
+        struct.pack_into("<I", self.__map, SEQUENCE_OFFSET + 20, 0)
+        self.__end()
+        for view in (self.__fader_positions, self.__fader_active, self.__fader_known, self.__button_active, self.__button_known):
+            view.release()
+        self.__map.close()
+        self.__file.close()
+
+class SnapshotReader:
+    """
+    Reads executor state published by a `SnapshotWriter`, without copying and without console traffic.
+
+    The table attributes are views straight into the shared region. Reads of several values are
+    consistent when made between `begin` and a `retry` that returns False:
+
+        while True:
+            sequence = reader.begin()
+            position = reader.fader_positions[0]
+            if not reader.retry(sequence):
+                break
+    """
+
+    def __init__(self, path: str = SNAPSHOT_FILE):
+        """
+        Args:
+            `path (str, optional)`: The file the writer publishes to. Defaults to `dot2pmp.snapshot` in the temp directory.
+
+        Raises:
+            `OSError`: If the file cannot be opened.
+            `ValueError`: If the file is not a snapshot of this version.
+        """
+        with open(path, "rb") as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, capacity = struct.unpack_from("<8sII", self.__map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.__map.close()
+            raise ValueError(f"{path} is not an executor snapshot")
+        self.capacity = capacity
+        offsets = _layout(capacity)
+        view = memoryview(self.__map)
+        self.fader_positions = view[offsets[0]:offsets[1]].cast('d')
+        self.fader_active = view[offsets[1]:offsets[2]].cast('b')
+        self.fader_known = view[offsets[2]:offsets[3]].cast('b')
+        self.button_active = view[offsets[3]:offsets[4]].cast('b')
+        self.button_known = view[offsets[4]:offsets[5]].cast('b')
+
+    def sequence(self) -> int:
+        return struct.unpack_from("<Q", self.__map, SEQUENCE_OFFSET)[0]
+
+    def begin(self) -> int:
+        """
+        Start a consistent read.
+
+        Returns:
+            `sequence (int)`: The sequence to pass to `retry`.
+
+        Raises:
+            `TimeoutError`: If the writer stays mid-publish.
+        """
+        deadline = 0.0
+        while True:
+            sequence = self.sequence()
+            if not sequence & 1:
+                return sequence
+            if not deadline:
+                deadline = time.monotonic() + READ_TIMEOUT
+            elif time.monotonic() > deadline:
+                raise TimeoutError("Snapshot writer did not finish publishing")
+            time.sleep(0)
+
+    def retry(self, sequence: int) -> bool:
+        """
+        Returns:
+            `retry (bool)`: Whether the state was published again since `begin`, so the values read must be discarded.
+        """
+        return self.sequence() != sequence
+
+    def __read(self, read):
+        deadline = time.monotonic() + READ_TIMEOUT
+        while True:
+            sequence = self.begin()
+            value = read()
+            if not self.retry(sequence):
+                return value
+            if time.monotonic() > deadline:
+                raise TimeoutError("Snapshot kept changing while being read")
+            time.sleep(0)
+
+    def status(self) -> Tuple[bool, int, float]:
+        """
+        Returns:
+            `connected, page_index, published (Tuple[bool, int, float])`: The session state and the `time.time()` of the last publish.
+        """
+        published, page_index, flags = self.__read(lambda: struct.unpack_from("<dII", self.__map, SEQUENCE_OFFSET + 8))
+        return bool(flags & CONNECTED), page_index, published
+
+    def fader(self, executor_number: int) -> Optional[Tuple[bool, float]]:
+        """
+        Returns:
+            `state (Optional[Tuple[bool, float]])`: The active flag and position of a fader executor, None if unknown.
+        """
+        index = executor_number - 1
+        if not 0 <= index < self.capacity:
+            return None
+        known, is_active, position = self.__read(lambda: (self.fader_known[index], self.fader_active[index], self.fader_positions[index]))
+        return (is_active == 1, position) if known else None
+
+    def button(self, executor_number: int) -> Optional[bool]:
+        """
+        Returns:
+            `is_active (Optional[bool])`: The active flag of a button executor, None if unknown.
+        """
+        index = executor_number - 1
+        if not 0 <= index < self.capacity:
+            return None
+        known, is_active = self.__read(lambda: (self.button_known[index], self.button_active[index]))
+        return is_active == 1 if known else None
+
+    def faders(self) -> Dict[int, Tuple[bool, float]]:
+        """
+        Returns:
+            `faders (Dict[int, Tuple[bool, float]])`: A consistent copy of every known fader, by executor number.
+        """
+        return self.__read(lambda: {
+            index + 1: (self.fader_active[index] == 1, self.fader_positions[index])
+            for index in range(self.capacity) if self.fader_known[index]
+        })
+
+    def buttons(self) -> Dict[int, bool]:
+        """
+        Returns:
+            `buttons (Dict[int, bool])`: A consistent copy of every known button, by executor number.
+        """
+        return self.__read(lambda: {
+            index + 1: self.button_active[index] == 1
+            for index in range(self.capacity) if self.button_known[index]
+        })
+
+    def close(self):
+        for view in (self.fader_positions, self.fader_active, self.fader_known, self.button_active, self.button_known):
+            view.release()
+        self.__map.close()
+
+__all__ = ['SnapshotWriter', 'SnapshotReader', 'SNAPSHOT_FILE', 'SNAPSHOT_CAPACITY']